@@ -26,7 +26,11 @@ class UserAdmin(BaseUserAdmin):
                 'country',
                 'region',
                 'city',
+                'country_ref',
+                'region_ref',
+                'city_ref',
                 'followers_count',
+                'following_count',
                 'is_email_verified',
                 'verification_badge',
                 'is_suspended',
@@ -50,40 +54,37 @@ class UserAdmin(BaseUserAdmin):
     )
 
     search_fields = ('username', 'email', 'business_name', 'country', 'city')
+    readonly_fields = ('followers_count', 'following_count', 'country_ref', 'region_ref', 'city_ref')
     list_filter = ('account_type', 'is_email_verified', 'is_verified', 'is_suspended', 'is_active')
     ordering = ('username',)
 
     # ========== Admin Actions ==========
+    # Set-based: one UPDATE per chunk of users (see UserQuerySet)
     @admin.action(description="Suspend selected users for 7 days")
     def suspend_users(self, request, queryset):
-        for user in queryset:
-            user.suspend(days=7)
-        self.message_user(request, "Selected users suspended for 7 days.")
+        count = queryset.suspend(days=7)
+        self.message_user(request, f"{count} users suspended for 7 days.")
 
     @admin.action(description="Unsuspend selected users")
     def unsuspend_users(self, request, queryset):
-        for user in queryset:
-            user.unsuspend()
-        self.message_user(request, "Selected users unsuspended successfully.")
+        count = queryset.unsuspend()
+        self.message_user(request, f"{count} users unsuspended successfully.")
 
     @admin.action(description="Upgrade selected users to Premium (30 days)")
     def upgrade_to_premium(self, request, queryset):
-        for user in queryset:
-            user.upgrade(plan_type='premium', days=30)
-        self.message_user(request, "Selected users upgraded to Premium for 30 days.")
+        count = queryset.upgrade(plan_type='premium', days=30)
+        self.message_user(request, f"{count} users upgraded to Premium for 30 days.")
 
     @admin.action(description="Send caution message to selected users")
     def send_caution(self, request, queryset):
         message = "Please adhere to Disbod's community guidelines."
-        for user in queryset:
-            user.caution(message)
-        self.message_user(request, "Caution messages sent to selected users.")
+        count = queryset.caution(message)
+        self.message_user(request, f"Caution messages sent to {count} users.")
 
     @admin.action(description="Block selected users (deactivate)")
     def block_users(self, request, queryset):
-        for user in queryset:
-            user.block()
-        self.message_user(request, "Selected users blocked successfully.")
+        count = queryset.block()
+        self.message_user(request, f"{count} users blocked successfully.")
 
     actions = [
         'suspend_users',
@@ -109,9 +110,10 @@ class FollowAdmin(admin.ModelAdmin):
 
 @admin.register(EmailVerificationCode)
 class EmailVerificationCodeAdmin(admin.ModelAdmin):
-    list_display = ('user', 'code', 'created_at', 'is_verified')
-    search_fields = ('user__username', 'code')
+    list_display = ('user', 'created_at', 'expires_at', 'is_verified')
+    search_fields = ('user__username', 'user__email')
     list_filter = ('is_verified', 'created_at')
+    readonly_fields = ('code_hash',)
 
 
 
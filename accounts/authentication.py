@@ -0,0 +1,148 @@
+"""
+JWT authentication with a cache of slim user snapshots.
+
+simplejwt's JWTAuthentication loads the whole accounts.User row on every
+request. CachedJWTAuthentication keeps the row's light columns (everything
+but bio, caution_message and password) in a bounded LRU+TTL cache in the
+process, optionally backed by a shared Django cache, and builds a fresh
+User instance from the snapshot per request. Entries are keyed by user id
+and tagged with the token version (simplejwt's revoke claim, when
+CHECK_REVOKE_TOKEN is on) they were verified for. Snapshots hold raw column
+values (file fields as their stored name), never model or FieldFile objects,
+so nothing mutable is shared between requests or threads.
+
+Entries are dropped by the signals in accounts.signals whenever a user is
+saved, deleted or moderated in bulk. Without SHARED_CACHE that only reaches
+the process that made the change: other workers keep serving their copy
+(including to a just-blocked or suspended user) until it expires, i.e. for
+at most TTL seconds (60 by default). Configure SHARED_CACHE when changes
+must apply across processes immediately.
+
+Settings (all optional), e.g.:
+    AUTH_USER_CACHE = {'MAX_SIZE': 10000, 'TTL': 60, 'SHARED_CACHE': 'default'}
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.fields.files import FieldFile
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache import LRUCache
+
+# Bump when the snapshot layout changes so shared-cache entries from an
+# older deploy are never read back.
+SNAPSHOT_VERSION = 3
+DEFERRED_FIELDS = ('bio', 'caution_message', 'password')
+
+
+def get_cache_settings():
+    return {'MAX_SIZE': 10000, 'TTL': 60, 'SHARED_CACHE': None, **getattr(settings, 'AUTH_USER_CACHE', {})}
+
+
+class UserSnapshotCache:
+    """Process-local LRU in front of an optional shared Django cache."""
+
+    def __init__(self):
+        conf = get_cache_settings()
+        self.ttl = conf['TTL']
+        self.shared_alias = conf['SHARED_CACHE']
+        self.local = LRUCache(maxsize=conf['MAX_SIZE'], ttl=self.ttl)
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def key(self, user_id):
+        return f'auth:user:v{SNAPSHOT_VERSION}:{user_id}'
+
+    def get(self, user_id, token_version):
+        """Snapshot for the user, or None if missing or cached for another token version."""
+        key = self.key(user_id)
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.local.set(key, entry)
+        if entry is None or entry[0] != token_version:
+            return None
+        return entry[1]
+
+    def set(self, user_id, token_version, snapshot):
+        key = self.key(user_id)
+        entry = (token_version, snapshot)
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, entry, self.ttl)
+
+    def invalidate(self, user_id):
+        key = self.key(user_id)
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+
+user_cache = UserSnapshotCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves request.user from user_cache."""
+
+    def snapshot_fields(self):
+        return [
+            f.attname for f in self.user_model._meta.concrete_fields
+            if f.name not in DEFERRED_FIELDS
+        ]
+
+    @staticmethod
+    def snapshot(user, fields):
+        """Raw column values; FieldFiles are bound to one instance, so keep their name."""
+        values = []
+        for name in fields:
+            value = user.__dict__[name]
+            values.append(value.name if isinstance(value, FieldFile) else value)
+        return tuple(values)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # The revoke claim changes with the password, so it versions the entry
+        token_version = (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            if api_settings.CHECK_REVOKE_TOKEN else None
+        )
+        fields = self.snapshot_fields()
+        snapshot = user_cache.get(user_id, token_version)
+        if snapshot is None:
+            user = self.load_user(user_id, fields, validated_token)
+            snapshot = self.snapshot(user, fields)
+            user_cache.set(user_id, token_version, snapshot)
+        else:
+            user = self.user_model.from_db(DEFAULT_DB_ALIAS, fields, snapshot)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def load_user(self, user_id, fields, validated_token):
+        only = list(fields)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            only.append('password')
+        try:
+            user = self.user_model.objects.only(*only).get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
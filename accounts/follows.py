@@ -0,0 +1,57 @@
+"""
+Batch follow-status lookups.
+
+`User.is_following` costs one EXISTS query per pair, which turns every list
+with Follow/Following buttons into N queries. `follow_status` answers the
+question for a whole page of ids with a single IN query, and
+`FollowStatusMemo` keeps the answers for the rest of the request so several
+serializers on the same response share them.
+"""
+
+from .models import Follow
+
+MAX_IDS = 500
+
+
+def follow_status(user, ids):
+    """{id: bool} telling whether `user` follows each of `ids`, in one query."""
+    ids = {int(pk) for pk in ids if pk is not None}
+    if not ids:
+        return {}
+    if not user or not user.is_authenticated:
+        return dict.fromkeys(ids, False)
+    followed = set(
+        Follow.objects.filter(follower_id=user.pk, following_id__in=ids)
+        .values_list('following_id', flat=True)
+    )
+    return {pk: pk in followed for pk in ids}
+
+
+class FollowStatusMemo:
+    """Follow state of one user, filled lazily in batches."""
+
+    def __init__(self, user):
+        self.user = user
+        self._known = {}
+
+    def __contains__(self, pk):
+        return pk in self._known
+
+    def load(self, ids):
+        missing = {pk for pk in ids if pk is not None and pk not in self._known}
+        if missing:
+            self._known.update(follow_status(self.user, missing))
+
+    def get(self, pk):
+        if pk not in self._known:
+            self.load([pk])
+        return self._known.get(pk, False)
+
+
+def memo_for(request):
+    """The FollowStatusMemo attached to `request`, created on first use."""
+    memo = getattr(request, '_follow_status_memo', None)
+    if memo is None:
+        memo = FollowStatusMemo(getattr(request, 'user', None))
+        request._follow_status_memo = memo
+    return memo
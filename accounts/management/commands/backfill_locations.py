@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from business.models import Business
+from core.locations import backfill
+from core.models import Location
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Map users' and businesses' country/region/city text onto Location rows."
+
+    def handle(self, *args, **options):
+        updated = backfill(User, Business, Location)
+        self.stdout.write(self.style.SUCCESS(
+            f"Mapped {updated} users onto {Location.objects.count()} locations."
+        ))
@@ -0,0 +1,69 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import MODERATION_CHUNK_SIZE
+
+User = get_user_model()
+
+ACTIONS = ('suspend', 'unsuspend', 'upgrade', 'caution', 'block')
+
+
+class Command(BaseCommand):
+    help = "Apply a moderation action to many users with chunked bulk UPDATEs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=ACTIONS)
+        parser.add_argument('--ids', default='', help="Comma separated user ids.")
+        parser.add_argument(
+            '--ids-file',
+            help="File with one user id per line ('-' reads stdin).",
+        )
+        parser.add_argument('--days', type=int, help="Suspension / upgrade length.")
+        parser.add_argument(
+            '--plan', default='premium',
+            choices=[value for value, _ in User._meta.get_field('account_type').choices],
+            help="Account type for upgrade.",
+        )
+        parser.add_argument('--message', help="Caution message.")
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def read_ids(self, options):
+        lines = options['ids'].split(',')
+        if options['ids_file'] == '-':
+            # Not ours to close
+            lines.extend(sys.stdin.read().split())
+        elif options['ids_file']:
+            with open(options['ids_file']) as handle:
+                lines.extend(handle.read().split())
+        try:
+            return sorted({int(line) for line in lines if line.strip()})
+        except ValueError as exc:
+            raise CommandError(f"Invalid user id: {exc}")
+
+    def handle(self, *args, **options):
+        ids = self.read_ids(options)
+        if not ids:
+            raise CommandError("Pass the users with --ids or --ids-file.")
+        if options['action'] == 'caution' and not options['message']:
+            raise CommandError("caution needs --message.")
+
+        action = options['action']
+        chunk_size = options['chunk_size'] or MODERATION_CHUNK_SIZE
+        count = 0
+        # Slice the id list too so the IN (...) clause stays small
+        for start in range(0, len(ids), chunk_size):
+            users = User.objects.filter(pk__in=ids[start:start + chunk_size])
+            count += self.apply(users, action, options)
+
+        self.stdout.write(self.style.SUCCESS(f"{action}: updated {count} of {len(ids)} users."))
+
+    def apply(self, users, action, options):
+        if action == 'suspend':
+            return users.suspend(days=options['days'] or 7)
+        if action == 'upgrade':
+            return users.upgrade(plan_type=options['plan'], days=options['days'] or 30)
+        if action == 'caution':
+            return users.caution(options['message'])
+        return getattr(users, action)()
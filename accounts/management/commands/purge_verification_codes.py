@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import EmailVerificationCode
+
+
+class Command(BaseCommand):
+    help = "Delete expired and used email verification codes in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and purge every N seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = EmailVerificationCode.purge_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} verification codes."))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
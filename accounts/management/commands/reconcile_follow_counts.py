@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import Follow
+
+User = get_user_model()
+
+
+def count_of(field):
+    """Correlated COUNT of Follow rows whose `field` is the outer user."""
+    return Coalesce(Subquery(
+        Follow.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(n=Count('pk')).values('n')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = "Repair drift in User.followers_count / following_count, in primary-key batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        repaired = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+
+            drifted = list(
+                User.objects.filter(pk__in=batch)
+                .annotate(actual_followers=count_of('following'), actual_following=count_of('follower'))
+                .filter(~Q(followers_count=F('actual_followers')) | ~Q(following_count=F('actual_following')))
+                .values_list('pk', flat=True)
+            )
+            if drifted:
+                with transaction.atomic():
+                    User.objects.filter(pk__in=drifted).update(
+                        followers_count=count_of('following'),
+                        following_count=count_of('follower'),
+                    )
+                repaired += len(drifted)
+
+        self.stdout.write(self.style.SUCCESS(f"Repaired follow counters of {repaired} users."))
@@ -0,0 +1,26 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "End expired suspensions and premium upgrades with bulk UPDATEs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and sweep every N seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            unsuspended, downgraded = User.sweep_expired_states()
+            self.stdout.write(self.style.SUCCESS(
+                f"Unsuspended {unsuspended} users, downgraded {downgraded} expired upgrades."
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
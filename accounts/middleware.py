@@ -4,7 +4,13 @@ from django.http import JsonResponse
 from django.utils import timezone
 
 class UserSuspensionMiddleware:
-    """Prevents suspended or blocked users from performing any action."""
+    """
+    Prevents suspended or blocked users from performing any action.
+
+    Only the already-loaded user row is inspected and nothing is written:
+    expired suspensions/upgrades are reflected on the request's user object,
+    and persisted in bulk by `manage.py sweep_account_states`.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -12,22 +18,19 @@ class UserSuspensionMiddleware:
     def __call__(self, request):
         user = getattr(request, 'user', None)
         if user and user.is_authenticated:
-            # Check suspension expiry
-            if user.is_suspended and user.suspended_until:
-                if timezone.now() > user.suspended_until:
-                    user.unsuspend()
-                else:
-                    return JsonResponse({
-                        "error": "Your account is suspended until " + str(user.suspended_until)
-                    }, status=403)
-
             # Check permanent block
             if not user.is_active:
                 return JsonResponse({
                     "error": "Your account has been blocked by Disbod Admin."
                 }, status=403)
 
-            # Auto-downgrade expired premium
-            user.downgrade_if_expired()
+            if user.next_state_change_at is not None:
+                now = timezone.now()
+                if user.is_currently_suspended(now):
+                    return JsonResponse({
+                        "error": "Your account is suspended until " + str(user.suspended_until)
+                    }, status=403)
+                # Expired suspension / premium upgrade, in memory only
+                user.apply_expired_states(now)
 
         return self.get_response(request)
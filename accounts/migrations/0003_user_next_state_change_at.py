@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+def backfill_next_state_change(apps, schema_editor):
+    # Frozen copy of accounts.models.next_state_change_expression as of this migration
+    Case, When, F, Q, Value = models.Case, models.When, models.F, models.Q, models.Value
+    suspension_end = Case(
+        When(is_suspended=True, then=F('suspended_until')),
+        default=Value(None),
+    )
+    next_change = Case(
+        When(Q(is_suspended=False) | Q(suspended_until__isnull=True), then=F('upgraded_until')),
+        When(upgraded_until__isnull=True, then=suspension_end),
+        When(suspended_until__lt=F('upgraded_until'), then=F('suspended_until')),
+        default=F('upgraded_until'),
+    )
+
+    User = apps.get_model('accounts', 'User')
+    User.objects.filter(
+        Q(upgraded_until__isnull=False) | Q(suspended_until__isnull=False)
+    ).update(next_state_change_at=next_change)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_caution_message_user_suspended_until_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='next_state_change_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_next_state_change, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_location_refs'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0001_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-followers_count', 'id', 'account_type'], name='user_explore_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:45
+
+import hashlib
+import hmac
+from datetime import timedelta
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of accounts.models.hash_verification_code as of this migration
+def hash_verification_code(email, code):
+    message = f"{str(email).strip().casefold()}:{str(code).strip()}"
+    return hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def hash_existing_codes(apps, schema_editor):
+    EmailVerificationCode = apps.get_model('accounts', 'EmailVerificationCode')
+    ttl = timedelta(minutes=getattr(settings, 'EMAIL_VERIFICATION_CODE_TTL_MINUTES', 10))
+    # Keep only the newest unverified code per user so the constraint holds
+    seen = set()
+    stale = []
+    codes = EmailVerificationCode.objects.select_related('user').order_by('user_id', '-created_at', '-pk')
+    for row in codes.iterator(chunk_size=1000):
+        if not row.is_verified:
+            if row.user_id in seen:
+                stale.append(row.pk)
+                continue
+            seen.add(row.user_id)
+        row.code_hash = hash_verification_code(row.user.email, row.code)
+        row.expires_at = row.created_at + ttl
+        row.save(update_fields=['code_hash', 'expires_at'])
+    EmailVerificationCode.objects.filter(pk__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_user_explore_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailverificationcode',
+            name='code_hash',
+            field=models.CharField(db_index=True, default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='emailverificationcode',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(hash_existing_codes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='emailverificationcode',
+            name='code',
+        ),
+        migrations.AddIndex(
+            model_name='emailverificationcode',
+            index=models.Index(fields=['user', '-created_at'], name='verification_user_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='emailverificationcode',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_verified', False)), fields=('user',), name='verification_one_active_per_user'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_verification_code_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailverificationcode',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,11 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, When, F, Q, Value
 from django.utils import timezone
 from datetime import timedelta
 
@@ -30,6 +36,94 @@ def profile_upload_path(instance, filename):
 
 
 
+#  ACCOUNT STATE EXPIRY
+
+# Fields whose values decide when a user's account state next changes
+STATE_FIELDS = {'is_suspended', 'suspended_until', 'upgraded_until'}
+
+# Free-text location columns (in hierarchy order) and their normalized refs
+LOCATION_FIELDS = ('country', 'region', 'city')
+LOCATION_REF_FIELDS = {'country_ref', 'region_ref', 'city_ref'}
+
+
+def next_state_change_expression():
+    """SQL equivalent of User.compute_next_state_change for bulk updates."""
+    suspension_end = Case(
+        When(is_suspended=True, then=F('suspended_until')),
+        default=Value(None),
+    )
+    return Case(
+        When(Q(is_suspended=False) | Q(suspended_until__isnull=True), then=F('upgraded_until')),
+        When(upgraded_until__isnull=True, then=suspension_end),
+        When(suspended_until__lt=F('upgraded_until'), then=F('suspended_until')),
+        default=F('upgraded_until'),
+    )
+
+
+
+#  EXPLORE LISTING
+
+# Accounts listed by accounts.views.ExploreView
+EXPLORE_ACCOUNT_TYPES = ('business', 'premium')
+EXPLORE_MIN_FOLLOWERS = 20
+
+
+
+#  BULK MODERATION
+
+MODERATION_CHUNK_SIZE = 1000
+
+
+class UserQuerySet(models.QuerySet):
+    """
+    Set-based moderation: each action is one UPDATE per chunk of ids instead
+    of a save() per user. Every chunk fires accounts.signals.users_moderated.
+    """
+
+    def _moderate(self, action, values, chunk_size=None, **details):
+        from .signals import users_moderated
+
+        chunk_size = chunk_size or MODERATION_CHUNK_SIZE
+        refresh_state = bool(STATE_FIELDS.intersection(values))
+        ids = self.order_by('pk').values_list('pk', flat=True)
+        total, last = 0, None
+        while True:
+            chunk = list((ids.filter(pk__gt=last) if last is not None else ids)[:chunk_size])
+            if not chunk:
+                return total
+            rows = User.objects.filter(pk__in=chunk)
+            with transaction.atomic():
+                total += rows.update(**values)
+                if refresh_state:
+                    rows.update(next_state_change_at=next_state_change_expression())
+            users_moderated.send(sender=self.model, action=action, user_ids=chunk, details=details)
+            last = chunk[-1]
+
+    def suspend(self, days=7, chunk_size=None):
+        until = timezone.now() + timedelta(days=days)
+        return self._moderate('suspend', {'is_suspended': True, 'suspended_until': until},
+                              chunk_size, days=days)
+
+    def unsuspend(self, chunk_size=None):
+        return self._moderate('unsuspend', {'is_suspended': False, 'suspended_until': None}, chunk_size)
+
+    def upgrade(self, plan_type='premium', days=30, chunk_size=None):
+        until = timezone.now() + timedelta(days=days)
+        return self._moderate('upgrade', {'account_type': plan_type, 'upgraded_until': until},
+                              chunk_size, plan_type=plan_type, days=days)
+
+    def caution(self, message, chunk_size=None):
+        return self._moderate('caution', {'caution_message': message}, chunk_size, message=message)
+
+    def block(self, chunk_size=None):
+        return self._moderate('block', {'is_active': False}, chunk_size)
+
+
+class AccountManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+
 #  CUSTOM USER MODEL
 
 class User(AbstractUser):
@@ -53,7 +147,15 @@ class User(AbstractUser):
     city = models.CharField(max_length=100, blank=True, null=True)
     location = models.CharField(max_length=150, blank=True, null=True)
     contact_number = models.CharField(max_length=20, blank=True, null=True)
+    # Normalized country/region/city, kept in sync by save(); filter on these
+    country_ref = models.ForeignKey('core.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    region_ref = models.ForeignKey('core.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    city_ref = models.ForeignKey('core.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
 
+    # Denormalized counters, changed atomically by follow()/unfollow()
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
 
     is_verified = models.BooleanField(default=False)
     is_email_verified = models.BooleanField(default=False)
@@ -67,10 +169,109 @@ class User(AbstractUser):
     suspended_until = models.DateTimeField(blank=True, null=True)
     caution_message = models.TextField(blank=True, null=True)
     upgraded_until = models.DateTimeField(blank=True, null=True)
+    # Earliest of suspended_until / upgraded_until; lets the sweeper find due rows by index
+    next_state_change_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = AccountManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # ExploreView: range on followers_count in keyset order, with
+            # account_type checked from the index. Not partial, because
+            # SQLite ignores partial indexes for queries with bound parameters.
+            models.Index(
+                fields=['-followers_count', 'id', 'account_type'],
+                name='user_explore_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_location = tuple(instance.__dict__.get(name) for name in LOCATION_FIELDS)
+        instance._stored_username = instance.__dict__.get('username')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.next_state_change_at = self.compute_next_state_change()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and STATE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'next_state_change_at'}
+
+        location_changed = self.sync_location_refs(update_fields)
+        if location_changed and update_fields is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | LOCATION_REF_FIELDS
+        super().save(*args, **kwargs)
+        self._stored_username = self.username
+        if location_changed:
+            self._stored_location = tuple(getattr(self, name) for name in LOCATION_FIELDS)
+            # Businesses carry a copy of their owner's location refs
+            from business.models import Business
+            Business.objects.filter(owner_id=self.pk).update(
+                country_ref=self.country_ref_id, region_ref=self.region_ref_id, city_ref=self.city_ref_id,
+            )
+
+    def sync_location_refs(self, update_fields=None):
+        """Point the *_ref foreign keys at the current country/region/city text."""
+        if update_fields is not None and not set(LOCATION_FIELDS).intersection(update_fields):
+            return False
+        current = tuple(getattr(self, name) for name in LOCATION_FIELDS)
+        if self.pk and current == getattr(self, '_stored_location', None):
+            return False
+        from core.models import Location
+        self.country_ref, self.region_ref, self.city_ref = Location.resolve(*current)
+        return True
+
+    def compute_next_state_change(self):
+        """When the suspension or the upgrade (whichever is first) runs out."""
+        candidates = [self.upgraded_until]
+        if self.is_suspended:
+            candidates.append(self.suspended_until)
+        candidates = [c for c in candidates if c is not None]
+        return min(candidates) if candidates else None
+
+    def is_currently_suspended(self, now=None):
+        """Suspension check on the loaded row only; expired suspensions don't count."""
+        if not (self.is_suspended and self.suspended_until):
+            return False
+        return (now or timezone.now()) <= self.suspended_until
+
+    def apply_expired_states(self, now=None):
+        """
+        Reflect expired suspension/upgrade on this instance without saving;
+        the sweep_account_states command persists them in bulk.
+        """
+        now = now or timezone.now()
+        if self.next_state_change_at is None or now < self.next_state_change_at:
+            return
+        if self.is_suspended and self.suspended_until and now > self.suspended_until:
+            self.is_suspended = False
+            self.suspended_until = None
+        if self.upgraded_until and now > self.upgraded_until:
+            self.account_type = 'normal'
+            self.upgraded_until = None
+        self.next_state_change_at = self.compute_next_state_change()
+
+    @classmethod
+    def sweep_expired_states(cls, now=None):
+        """
+        Apply every due suspension end / upgrade expiry with set-based
+        UPDATEs. Returns (unsuspended, downgraded) row counts.
+        """
+        now = now or timezone.now()
+        due = cls.objects.filter(next_state_change_at__lte=now)
+        unsuspended = due.filter(is_suspended=True, suspended_until__lt=now).update(
+            is_suspended=False, suspended_until=None
+        )
+        downgraded = due.filter(upgraded_until__lt=now).update(
+            account_type='normal', upgraded_until=None
+        )
+        due.update(next_state_change_at=next_state_change_expression())
+        return unsuspended, downgraded
+
     # ✅ Admin logic methods
 
     def suspend(self, days=7):
@@ -115,6 +316,46 @@ class User(AbstractUser):
         """Check if this user is following another user."""
         return Follow.objects.filter(follower=self, following=user).exists()
 
+    def follow(self, user):
+        """
+        Follow `user`, bumping both counters with F() in the same transaction
+        as the Follow insert. Returns False if already following.
+        """
+        try:
+            with transaction.atomic():
+                self._bump_counters(user, 1)
+                Follow.objects.create(follower=self, following=user)
+        except IntegrityError:
+            return False
+        self._counters_changed(user)
+        return True
+
+    def unfollow(self, user):
+        """Stop following `user`. Returns False if not following."""
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(follower=self, following=user).delete()
+            if not deleted:
+                return False
+            self._bump_counters(user, -1)
+        self._counters_changed(user)
+        return True
+
+    def _bump_counters(self, user, delta):
+        # Lock the two rows in pk order, so A following B while B follows A
+        # can't deadlock on backends with row locks
+        for pk, field in sorted([(user.pk, 'followers_count'), (self.pk, 'following_count')]):
+            rows = User.objects.filter(pk=pk)
+            if delta < 0:
+                rows = rows.filter(**{f'{field}__gt': 0})
+            rows.update(**{field: F(field) + delta})
+
+    def _counters_changed(self, user):
+        # update() skips post_save, so drop cached auth snapshots by hand
+        from .authentication import user_cache
+
+        user_cache.invalidate(self.pk)
+        user_cache.invalidate(user.pk)
+
 
 
 #  FOLLOW MODEL
@@ -126,6 +367,11 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('follower', 'following')
+        indexes = [
+            # keyset pages of /<id>/followers/ and /<id>/following/
+            models.Index(fields=['following', '-created_at', '-id'], name='follow_followers_page_idx'),
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_following_page_idx'),
+        ]
         verbose_name = "Follow"
         verbose_name_plural = "Follows"
 
@@ -136,14 +382,106 @@ class Follow(models.Model):
 
 #  EMAIL VERIFICATION
 
+def verification_code_ttl():
+    return timedelta(minutes=getattr(settings, 'EMAIL_VERIFICATION_CODE_TTL_MINUTES', 10))
+
+
+def verification_max_attempts():
+    return getattr(settings, 'EMAIL_VERIFICATION_CODE_MAX_ATTEMPTS', 5)
+
+
+def hash_verification_code(email, code):
+    """Keyed hash of a code, bound to the (normalized) email it was sent to."""
+    message = f"{str(email).strip().casefold()}:{str(code).strip()}"
+    return hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
 class EmailVerificationCode(models.Model):
+    """
+    Email verification codes. Only the hash is stored; a user has at most one
+    unverified code, replaced in place when a new one is issued. A code stops
+    working after EMAIL_VERIFICATION_CODE_MAX_ATTEMPTS wrong guesses. Expired and
+    used rows are removed by `manage.py purge_verification_codes`.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    code = models.CharField(max_length=6)
+    code_hash = models.CharField(max_length=64, db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
     is_verified = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='verification_user_recent_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'], condition=Q(is_verified=False), name='verification_one_active_per_user'
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.user.username} - {self.code}"
+        return f"{self.user.username} - {self.created_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def issue(cls, user):
+        """Create or replace the user's active code and return it in plain text."""
+        code = f"{secrets.randbelow(1000000):06d}"
+        now = timezone.now()
+        values = {
+            'code_hash': hash_verification_code(user.email, code),
+            'created_at': now,
+            'expires_at': now + verification_code_ttl(),
+            'attempts': 0,
+        }
+        active = cls.objects.filter(user=user, is_verified=False)
+        if not active.update(**values):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user=user, **values)
+            except IntegrityError:
+                # A concurrent request created it first
+                active.update(**values)
+        return code
+
+    @classmethod
+    def redeem(cls, email, code):
+        """
+        Mark the matching unexpired code as used and return its user, or None.
+        Looked up by the indexed code_hash in a single query; a miss counts
+        as a wrong attempt against the user's active code.
+        """
+        verification = (
+            cls.objects.select_related('user')
+            .filter(
+                code_hash=hash_verification_code(email, code),
+                is_verified=False,
+                expires_at__gt=timezone.now(),
+                attempts__lt=verification_max_attempts(),
+                user__email__iexact=str(email).strip(),
+            )
+            .first()
+        )
+        if verification is None:
+            cls.objects.filter(user__email__iexact=str(email).strip(), is_verified=False).update(
+                attempts=F('attempts') + 1
+            )
+            return None
+        # Guarded so two concurrent redeems cannot both succeed
+        if not cls.objects.filter(pk=verification.pk, is_verified=False).update(is_verified=True):
+            return None
+        return verification.user
+
+    @classmethod
+    def purge_expired(cls, batch_size=1000, now=None):
+        """Delete expired or used codes in batches. Returns the number deleted."""
+        stale = cls.objects.filter(Q(expires_at__lt=now or timezone.now()) | Q(is_verified=True))
+        deleted = 0
+        while True:
+            ids = list(stale.order_by().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(pk__in=ids).delete()[0]
 
 
 
@@ -1,6 +1,29 @@
 from rest_framework import serializers
 from .models import User
 from .models import Follow
+from .follows import memo_for
+
+
+class FollowStatusMixin(serializers.Serializer):
+    """
+    Adds `is_following` for the requesting user. The first row of a list
+    loads the follow state of the whole page in one query; the answers are
+    memoized on the request. `follow_target` names the attribute holding
+    the followed user's id.
+    """
+    follow_target = 'pk'
+
+    is_following = serializers.SerializerMethodField()
+
+    def get_is_following(self, obj):
+        request = self.context.get('request')
+        if request is None:
+            return False
+        memo = memo_for(request)
+        pk = getattr(obj, self.follow_target)
+        if pk not in memo and isinstance(self.parent, serializers.ListSerializer):
+            memo.load([getattr(row, self.follow_target) for row in self.parent.instance or ()])
+        return memo.get(pk)
 
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,6 +38,32 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 
 
+SLIM_USER_FIELDS = ['id', 'username', 'business_name', 'profile_image', 'account_type', 'is_verified']
+
+
+class SlimUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = SLIM_USER_FIELDS
+        read_only_fields = SLIM_USER_FIELDS
+
+
+class FollowerListSerializer(serializers.ModelSerializer):
+    user = SlimUserSerializer(source='follower', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ["id", "user", "created_at"]
+
+
+class FollowingListSerializer(serializers.ModelSerializer):
+    user = SlimUserSerializer(source='following', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ["id", "user", "created_at"]
+
+
 class FollowSerializer(serializers.ModelSerializer):
     follower_username = serializers.CharField(source='follower.username', read_only=True)
     following_username = serializers.CharField(source='following.username', read_only=True)
@@ -24,18 +73,18 @@ class FollowSerializer(serializers.ModelSerializer):
         fields = ["id", "follower", "follower_username", "following", "following_username", "created_at"]
         
         
-class ExploreSerializer(serializers.ModelSerializer):
+class ExploreSerializer(FollowStatusMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
             "id", "username", "business_name", "account_type",
             "business_category", "country", "region", "city",
-            "followers_count", "profile_image", "is_verified"
+            "followers_count", "profile_image", "is_verified", "is_following"
         ]
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FollowStatusMixin, serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'business_name', 'profile_image', 'account_type']
+        fields = ['id', 'username', 'business_name', 'profile_image', 'account_type', 'is_following']
         read_only_fields = ['id', 'username', 'business_name', 'profile_image', 'account_type']
         
\ No newline at end of file
@@ -0,0 +1,28 @@
+import logging
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .authentication import user_cache
+
+logger = logging.getLogger(__name__)
+
+# ✅ Sent once per chunk by the bulk moderation methods on UserQuerySet,
+# with action, user_ids and details (e.g. days, message)
+users_moderated = Signal()
+
+
+# ✅ Drop cached auth snapshots whenever a user row changes
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_auth_snapshot(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+# ✅ Bulk moderation skips post_save: drop snapshots and leave an audit line
+@receiver(users_moderated)
+def audit_moderation(sender, action, user_ids, details, **kwargs):
+    for pk in user_ids:
+        user_cache.invalidate(pk)
+    logger.info("Moderation %s applied to %d users %s", action, len(user_ids), details)
@@ -1,3 +1,517 @@
-from django.test import TestCase
+import io
+import tempfile
+import time
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.fields.files import FieldFile
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import throttling
+from accounts.signals import users_moderated
+from accounts.authentication import CachedJWTAuthentication, user_cache
+from accounts.middleware import UserSuspensionMiddleware
+from accounts.models import EXPLORE_MIN_FOLLOWERS, EmailVerificationCode, Follow, User, hash_verification_code
+from accounts.serializers import UserSerializer
+from accounts.throttling import LocalBuckets, LoginRateThrottle, SharedWindows
+from accounts.views import ExploreView
+from business.models import Business
+from core.models import Location
+from core.pagination import KeysetPagination
+
+
+class UserSuspensionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.middleware = UserSuspensionMiddleware(lambda request: HttpResponse('ok'))
+
+    def call(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return self.middleware(request)
+
+    def make_user(self, **fields):
+        user = User.objects.create_user(username='member', email='member@example.com', **fields)
+        user.next_state_change_at = user.compute_next_state_change()
+        return user
+
+    def test_blocked_and_suspended_users_are_rejected(self):
+        user = self.make_user(is_active=False)
+        self.assertEqual(self.call(user).status_code, 403)
+
+        user.is_active = True
+        user.is_suspended = True
+        user.suspended_until = timezone.now() + timedelta(days=1)
+        user.next_state_change_at = user.compute_next_state_change()
+        self.assertEqual(self.call(user).status_code, 403)
+
+    def test_expired_states_apply_in_memory_without_queries(self):
+        past = timezone.now() - timedelta(minutes=1)
+        user = self.make_user(is_suspended=True, suspended_until=past, account_type='premium', upgraded_until=past)
+        with self.assertNumQueries(0):
+            response = self.call(user)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(user.is_suspended)
+        self.assertEqual(user.account_type, 'normal')
+
+        stored = User.objects.get(pk=user.pk)
+        self.assertTrue(stored.is_suspended)
+
+    def test_sweep_persists_expiries_in_bulk(self):
+        past = timezone.now() - timedelta(minutes=1)
+        User.objects.create_user(username='member', email='member@example.com',
+                                 is_suspended=True, suspended_until=past, next_state_change_at=past)
+        with self.assertNumQueries(3):
+            self.assertEqual(User.sweep_expired_states(), (1, 0))
+        stored = User.objects.get(username='member')
+        self.assertFalse(stored.is_suspended)
+        self.assertIsNone(stored.next_state_change_at)
+
+    def test_per_request_overhead(self):
+        """Benchmark: the check adds a few microseconds per request and no queries."""
+        user = self.make_user(account_type='premium', upgraded_until=timezone.now() + timedelta(days=30))
+        request = RequestFactory().get('/')
+        request.user = user
+        bare = lambda request: None  # noqa: E731
+        middleware = UserSuspensionMiddleware(bare)
+        rounds = 20000
+
+        with self.assertNumQueries(0):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                middleware(request)
+            with_middleware = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(rounds):
+            bare(request)
+        baseline = time.perf_counter() - started
+
+        overhead_us = (with_middleware - baseline) / rounds * 1e6
+        print(f"\nUserSuspensionMiddleware: {overhead_us:.2f} us/request over {rounds} requests")
+        # Generous bound so slow CI machines don't flake
+        self.assertLess(overhead_us, 200)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.local.clear()
+        self.user = User.objects.create_user(username='member', email='member@example.com')
+        User.objects.filter(pk=self.user.pk).update(profile_image='profiles/member/me.jpg')
+        self.token = AccessToken.for_user(self.user)
+
+    def test_snapshot_holds_raw_values_and_users_are_not_shared(self):
+        auth = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            first = auth.get_user(self.token)
+        with self.assertNumQueries(0):
+            second = auth.get_user(self.token)
+
+        entry = user_cache.get(self.user.pk, None)
+        self.assertIn('profiles/member/me.jpg', entry)
+        self.assertFalse(any(isinstance(value, FieldFile) for value in entry))
+        self.assertIsNot(first, second)
+        self.assertIs(second.profile_image.instance, second)
+        self.assertIs(first.profile_image.instance, first)
+        self.assertEqual(second.profile_image.name, 'profiles/member/me.jpg')
+
+    def test_save_invalidates_the_snapshot(self):
+        auth = CachedJWTAuthentication()
+        auth.get_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth.get_user(self.token)
+
+
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        self.a, self.b = User.objects.bulk_create([
+            User(username='a', email='a@example.com'), User(username='b', email='b@example.com'),
+        ])
+
+    def counts(self, user):
+        user.refresh_from_db(fields=['followers_count', 'following_count'])
+        return user.followers_count, user.following_count
+
+    def test_counters_follow_and_unfollow(self):
+        self.assertTrue(self.b.follow(self.a))
+        self.assertFalse(self.b.follow(self.a))
+        self.assertEqual((self.counts(self.a), self.counts(self.b)), ((1, 0), (0, 1)))
+        self.assertTrue(self.b.unfollow(self.a))
+        self.assertFalse(self.b.unfollow(self.a))
+        self.assertEqual((self.counts(self.a), self.counts(self.b)), ((0, 0), (0, 0)))
+
+    def test_user_rows_are_updated_in_pk_order(self):
+        for follower, target in ((self.a, self.b), (self.b, self.a)):
+            with CaptureQueriesContext(connection) as queries:
+                follower.follow(target)
+            updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+            self.assertEqual(len(updates), 2)
+            self.assertIn(f'"id" = {self.a.pk}', updates[0])
+            self.assertIn(f'"id" = {self.b.pk}', updates[1])
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class ExploreIndexTests(TestCase):
+    def test_explore_page_query_uses_user_explore_idx(self):
+        view = ExploreView()
+        view.request = Request(APIRequestFactory().get('/api/accounts/explore/'))
+        queryset = view.get_queryset()
+
+        # Same ordering and LIMIT as a KeysetPagination page
+        paginator = KeysetPagination()
+        paginator.fields = paginator.get_ordering(queryset)
+        paginator.nullable = paginator.get_nullable(queryset)
+        page = queryset.order_by(*paginator.order_by(False))[:paginator.page_size + 1]
+
+        sql, params = page.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('user_explore_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ThrottleStoreTests(TestCase):
+    def test_token_bucket_refills_over_time(self):
+        buckets = LocalBuckets(maxsize=10)
+        with patch('accounts.throttling.time.monotonic', return_value=100.0):
+            self.assertEqual(buckets.take('k', 2, 1.0), 0)
+            self.assertEqual(buckets.take('k', 2, 1.0), 0)
+            self.assertAlmostEqual(buckets.take('k', 2, 1.0), 1.0)
+        with patch('accounts.throttling.time.monotonic', return_value=100.5):
+            self.assertAlmostEqual(buckets.take('k', 2, 1.0), 0.5)
+        with patch('accounts.throttling.time.monotonic', return_value=101.0):
+            self.assertEqual(buckets.take('k', 2, 1.0), 0)
+
+    def test_local_buckets_are_bounded(self):
+        buckets = LocalBuckets(maxsize=3)
+        for i in range(10):
+            buckets.take(f'key{i}', 5, 1.0)
+        self.assertEqual(len(buckets._buckets), 3)
+
+    def test_shared_windows_slide_across_window_boundaries(self):
+        caches['default'].clear()
+        windows = SharedWindows('default')
+        # 2 requests per 60s window
+        with patch('accounts.throttling.time.time', return_value=6000.0):
+            self.assertEqual(windows.take('k', 2, 2 / 60), 0)
+            self.assertEqual(windows.take('k', 2, 2 / 60), 0)
+            self.assertGreater(windows.take('k', 2, 2 / 60), 0)
+        # Halfway into the next window half of the previous count still applies
+        with patch('accounts.throttling.time.time', return_value=6090.0):
+            self.assertEqual(windows.take('k', 2, 2 / 60), 0)
+            self.assertGreater(windows.take('k', 2, 2 / 60), 0)
+        with patch('accounts.throttling.time.time', return_value=6200.0):
+            self.assertEqual(windows.take('k', 2, 2 / 60), 0)
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        throttling._store = LocalBuckets(maxsize=1000)
+
+    def tearDown(self):
+        throttling._store = None
+
+    def test_same_email_from_many_ips_is_limited(self):
+        client = APIClient()
+        statuses = [
+            client.post('/api/accounts/login/', {'email': 'Victim@Example.com', 'password': 'x'},
+                        REMOTE_ADDR=f'10.0.0.{i}').status_code
+            for i in range(11)
+        ]
+        self.assertNotIn(429, statuses[:10])
+        self.assertEqual(statuses[10], 429)
+
+    def test_allow_request_overhead(self):
+        """Benchmark: per-request cost of the IP + email buckets."""
+        throttle = LoginRateThrottle()
+        throttle.num_requests = 10 ** 9
+        request = Request(APIRequestFactory().post('/', {'email': 'a@example.com'}, format='json'),
+                          parsers=[JSONParser()])
+        request.data  # parse once, as the view would
+        rounds = 20000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            throttle.allow_request(request, None)
+        per_request_us = (time.perf_counter() - started) / rounds * 1e6
+        print(f"\nLoginRateThrottle.allow_request: {per_request_us:.2f} us/request over {rounds} requests")
+        self.assertLess(per_request_us, 500)
+
+
+class FollowStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(username='viewer', email='viewer@example.com')
+        cls.others = [User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com') for i in range(6)]
+        for other in cls.others[::2]:
+            cls.viewer.follow(other)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_endpoint_answers_a_batch_in_one_query(self):
+        ids = ','.join(str(other.pk) for other in self.others)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/accounts/follow-status/', {'ids': ids})
+        self.assertEqual(response.json(), {str(other.pk): i % 2 == 0 for i, other in enumerate(self.others)})
+
+    def test_endpoint_rejects_bad_input(self):
+        self.assertEqual(self.client.get('/api/accounts/follow-status/', {'ids': '1,x'}).status_code, 400)
+        too_many = ','.join(str(i) for i in range(1, 502))
+        self.assertEqual(self.client.get('/api/accounts/follow-status/', {'ids': too_many}).status_code, 400)
+        self.assertEqual(APIClient().get('/api/accounts/follow-status/', {'ids': '1'}).status_code, 401)
+
+    def serialize(self, user):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user
+        return UserSerializer(self.others, many=True, context={'request': request}).data
+
+    def test_serializer_loads_the_whole_page_at_once(self):
+        with self.assertNumQueries(1):
+            data = self.serialize(self.viewer)
+        self.assertEqual([row['is_following'] for row in data], [True, False] * 3)
+
+    def test_anonymous_users_follow_no_one_without_queries(self):
+        with self.assertNumQueries(0):
+            data = self.serialize(AnonymousUser())
+        self.assertFalse(any(row['is_following'] for row in data))
+
+
+class FollowListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.star = User.objects.create_user(username='star', email='star@example.com')
+        cls.fans = [User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com') for i in range(30)]
+        for fan in cls.fans:
+            fan.follow(cls.star)
+        # Equal timestamps for half of them, so the id tie-breaker matters
+        same = timezone.now()
+        Follow.objects.filter(follower__in=cls.fans[:15]).update(created_at=same)
+        Follow.objects.filter(follower__in=cls.fans[15:]).update(created_at=same + timedelta(minutes=1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.star)
+
+    def walk(self, url):
+        names, pages = [], 0
+        while url:
+            with self.assertNumQueries(2):  # existence check + the page
+                body = self.client.get(url, {'page_size': 12} if pages == 0 else None).json()
+            names += [row['user']['username'] for row in body['results']]
+            url, pages = body['next'], pages + 1
+        return names, pages
+
+    def test_followers_are_paged_newest_first(self):
+        names, pages = self.walk(f'/api/accounts/{self.star.pk}/followers/')
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, [fan.username for fan in reversed(self.fans)])
+
+    def test_following_lists_the_followed_users(self):
+        response = self.client.get(f'/api/accounts/{self.fans[0].pk}/following/')
+        self.assertEqual([row['user']['username'] for row in response.json()['results']], ['star'])
+        self.assertEqual(self.client.get('/api/accounts/999999/following/').status_code, 404)
+
+
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com') for i in range(5)]
+        cls.ids = [user.pk for user in cls.users]
+
+    def setUp(self):
+        self.chunks = []
+
+        def record(sender, action, user_ids, details, **kwargs):
+            self.chunks.append((action, user_ids))
+
+        users_moderated.connect(record)
+        self.addCleanup(users_moderated.disconnect, record)
+
+    def test_moderate_updates_in_chunks_and_refreshes_state(self):
+        count = User.objects.filter(pk__in=self.ids).suspend(days=3, chunk_size=2)
+        self.assertEqual(count, 5)
+        self.assertEqual([ids for _, ids in self.chunks], [self.ids[:2], self.ids[2:4], self.ids[4:]])
+        user = User.objects.get(pk=self.ids[0])
+        self.assertTrue(user.is_currently_suspended())
+        self.assertEqual(user.next_state_change_at, user.suspended_until)
+
+        User.objects.filter(pk__in=self.ids).unsuspend()
+        self.assertFalse(User.objects.filter(pk__in=self.ids, next_state_change_at__isnull=False).exists())
+
+    def test_admin_actions(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password=None)
+        self.client.force_login(admin)
+        for action, check in (
+            ('upgrade_to_premium', {'account_type': 'premium'}),
+            ('send_caution', {'caution_message__isnull': False}),
+            ('block_users', {'is_active': False}),
+        ):
+            response = self.client.post('/admin/accounts/user/', {
+                'action': action, '_selected_action': self.ids[:2],
+            })
+            self.assertEqual(response.status_code, 302, action)
+            self.assertEqual(User.objects.filter(pk__in=self.ids, **check).count(), 2, action)
+
+    def test_command_reads_ids_from_options_files_and_stdin(self):
+        out = io.StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as ids_file:
+            ids_file.write(f'{self.ids[1]}\n{self.ids[2]}\n')
+            ids_file.flush()
+            call_command('moderate_users', 'upgrade', f'--ids={self.ids[0]}', f'--ids-file={ids_file.name}',
+                         '--plan=business', stdout=out)
+        self.assertIn('updated 3 of 3', out.getvalue())
+        self.assertEqual(User.objects.filter(account_type='business').count(), 3)
+
+        stdin = io.StringIO(f'{self.ids[3]}\n')
+        with patch('sys.stdin', stdin):
+            call_command('moderate_users', 'block', '--ids-file=-', stdout=out)
+        self.assertFalse(stdin.closed)
+        self.assertFalse(User.objects.get(pk=self.ids[3]).is_active)
+
+    def test_command_rejects_bad_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command('moderate_users', 'upgrade', f'--ids={self.ids[0]}', '--plan=garbage')
+        with self.assertRaises(CommandError):
+            call_command('moderate_users', 'caution', f'--ids={self.ids[0]}')
+        with self.assertRaises(CommandError):
+            call_command('moderate_users', 'block', '--ids=1,x')
+        self.assertFalse(User.objects.exclude(account_type='normal').exists())
+
+
+class LocationRefTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(username='viewer', email='viewer@example.com')
+        cls.seller = User.objects.create_user(
+            username='seller', email='seller@example.com', account_type='business',
+            country='Kenya', region='Nairobi County', city='Nairobi',
+        )
+        cls.business = Business.objects.create(owner=cls.seller, name='Shop', slug='shop', category='food')
+        User.objects.filter(pk=cls.seller.pk).update(followers_count=EXPLORE_MIN_FOLLOWERS)
+
+    def test_save_syncs_refs_and_copies_them_to_the_business(self):
+        self.assertEqual(self.seller.city_ref, Location.objects.get(level=Location.CITY, key='nairobi'))
+        self.assertEqual(self.business.city_ref_id, self.seller.city_ref_id)
+
+        seller = User.objects.get(pk=self.seller.pk)
+        seller.city = ' mombasa '
+        seller.save(update_fields=['city'])
+        seller.refresh_from_db()
+        self.assertEqual((seller.city_ref.key, seller.city_ref.parent), ('mombasa', seller.region_ref))
+        self.assertEqual(Business.objects.get(pk=self.business.pk).city_ref_id, seller.city_ref_id)
+
+    def test_unchanged_location_is_not_resolved_again(self):
+        seller = User.objects.get(pk=self.seller.pk)
+        seller.bio = 'Shoes'
+        with self.assertNumQueries(1):
+            seller.save(update_fields=['bio'])
+        with self.assertNumQueries(1):
+            seller.save()
+
+    def test_explore_filters_on_exact_normalized_location(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        for params, expected in (
+            ({'country': ' KENYA '}, ['seller']),
+            ({'country': 'ken'}, []),
+            ({'region': 'nairobi  county', 'city': 'Nairobi'}, ['seller']),
+            ({'city': 'Nairob'}, []),
+            ({'city': 'Mombasa'}, []),
+        ):
+            with self.subTest(params=params):
+                response = client.get('/api/accounts/explore/', params)
+                self.assertEqual([row['username'] for row in response.json()['results']], expected)
+
+    def test_backfill_command_maps_existing_rows(self):
+        User.objects.update(country_ref=None, region_ref=None, city_ref=None)
+        Business.objects.update(country_ref=None, region_ref=None, city_ref=None)
+        Location.objects.all().delete()
+
+        out = io.StringIO()
+        call_command('backfill_locations', stdout=out)
+        self.assertIn('Mapped 2 users onto 3 locations.', out.getvalue())
+        seller = User.objects.get(pk=self.seller.pk)
+        self.assertEqual(seller.country_ref.key, 'kenya')
+        self.assertEqual(Business.objects.get(pk=self.business.pk).city_ref_id, seller.city_ref_id)
+        self.assertIsNone(User.objects.get(pk=self.viewer.pk).country_ref)
+
+
+class VerificationCodeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='new', email='new@example.com')
+
+    def test_only_a_keyed_hash_is_stored(self):
+        code = EmailVerificationCode.issue(self.user)
+        stored = EmailVerificationCode.objects.get(user=self.user)
+        self.assertRegex(code, r'^\d{6}$')
+        self.assertNotIn(code, stored.code_hash)
+        self.assertEqual(stored.code_hash, hash_verification_code('new@example.com', code))
+
+    def test_redeem_marks_the_code_used(self):
+        code = EmailVerificationCode.issue(self.user)
+        with self.assertNumQueries(2):
+            self.assertEqual(EmailVerificationCode.redeem(' NEW@example.com ', code), self.user)
+        self.assertTrue(EmailVerificationCode.objects.get(user=self.user).is_verified)
+        self.assertIsNone(EmailVerificationCode.redeem('new@example.com', code))
+
+    def test_wrong_code_or_email_is_rejected(self):
+        code = EmailVerificationCode.issue(self.user)
+        wrong = f'{(int(code) + 1) % 1000000:06d}'
+        self.assertIsNone(EmailVerificationCode.redeem('new@example.com', wrong))
+        self.assertIsNone(EmailVerificationCode.redeem('other@example.com', code))
+        self.assertEqual(EmailVerificationCode.redeem('new@example.com', code), self.user)
+
+    @override_settings(EMAIL_VERIFICATION_CODE_MAX_ATTEMPTS=3)
+    def test_code_stops_working_after_too_many_wrong_attempts(self):
+        code = EmailVerificationCode.issue(self.user)
+        wrong = f'{(int(code) + 1) % 1000000:06d}'
+        for _ in range(3):
+            self.assertIsNone(EmailVerificationCode.redeem('new@example.com', wrong))
+        self.assertIsNone(EmailVerificationCode.redeem('new@example.com', code))
+
+        code = EmailVerificationCode.issue(self.user)
+        self.assertEqual(EmailVerificationCode.redeem('new@example.com', code), self.user)
+
+    def test_expired_code_is_rejected(self):
+        code = EmailVerificationCode.issue(self.user)
+        EmailVerificationCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(EmailVerificationCode.redeem('new@example.com', code))
+
+    def test_reissuing_replaces_the_previous_code(self):
+        first = EmailVerificationCode.issue(self.user)
+        second = EmailVerificationCode.issue(self.user)
+        while second == first:
+            second = EmailVerificationCode.issue(self.user)
+        self.assertEqual(EmailVerificationCode.objects.filter(user=self.user).count(), 1)
+        self.assertIsNone(EmailVerificationCode.redeem('new@example.com', first))
+        self.assertEqual(EmailVerificationCode.redeem('new@example.com', second), self.user)
+
+    def test_purge_deletes_expired_and_used_codes_only(self):
+        others = [User.objects.create_user(username=f'u{i}', email=f'u{i}@example.com') for i in range(3)]
+        for user in [self.user, *others]:
+            EmailVerificationCode.issue(user)
+        EmailVerificationCode.objects.filter(user=others[0]).update(expires_at=timezone.now() - timedelta(minutes=1))
+        EmailVerificationCode.objects.filter(user=others[1]).update(is_verified=True)
+
+        out = io.StringIO()
+        call_command('purge_verification_codes', '--batch-size=1', stdout=out)
+        self.assertIn('Deleted 2 verification codes.', out.getvalue())
+        self.assertEqual(
+            sorted(EmailVerificationCode.objects.values_list('user__username', flat=True)), ['new', 'u2']
+        )
@@ -0,0 +1,133 @@
+"""
+Rate limiting for the unauthenticated account endpoints.
+
+Each request spends one token from two buckets, one keyed by client IP and
+one by the normalized email in the payload, so neither rotating emails from
+one host nor spreading one email over many hosts gets past the limit. By
+default buckets live in a process-local LRU bounded to MAX_KEYS entries, each
+a (tokens, timestamp) pair; set SHARED_CACHE to a CACHES alias to enforce
+the limit across processes with sliding-window counters instead.
+
+Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] under the
+throttle's scope, e.g. {'login': '10/min'}. Other settings, e.g.:
+    AUTH_THROTTLE = {'MAX_KEYS': 100000, 'SHARED_CACHE': 'default'}
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from core.cache import LRUCache
+
+
+def get_throttle_settings():
+    return {'MAX_KEYS': 100000, 'SHARED_CACHE': None, **getattr(settings, 'AUTH_THROTTLE', {})}
+
+
+class LocalBuckets:
+    """Token buckets in a bounded LRU; idle buckets fall out once refilled."""
+
+    def __init__(self, maxsize):
+        self._buckets = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second):
+        """Spend a token. Returns 0 if allowed, else seconds until the next one."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * per_second)
+            if tokens < 1:
+                self._buckets.set(key, (tokens, now), ttl=capacity / per_second)
+                return (1 - tokens) / per_second
+            self._buckets.set(key, (tokens - 1, now), ttl=capacity / per_second)
+            return 0
+
+
+class SharedWindows:
+    """Sliding-window counters in a Django cache, approximated from two fixed windows."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, capacity, per_second):
+        cache = caches[self.alias]
+        window = capacity / per_second
+        now = time.time()
+        current = int(now // window)
+        current_key = f'throttle:{key}:{current}'
+        cache.add(current_key, 0, timeout=int(window * 2) + 1)
+        try:
+            count = cache.incr(current_key)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(current_key, 1, timeout=int(window * 2) + 1)
+            count = 1
+        previous = cache.get(f'throttle:{key}:{current - 1}', 0)
+        elapsed = (now % window) / window
+        if previous * (1 - elapsed) + count <= capacity:
+            return 0
+        # Rejected requests don't count, as with LocalBuckets
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        return window - now % window
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        conf = get_throttle_settings()
+        if conf['SHARED_CACHE']:
+            _store = SharedWindows(conf['SHARED_CACHE'])
+        else:
+            _store = LocalBuckets(conf['MAX_KEYS'])
+    return _store
+
+
+class IPEmailRateThrottle(BaseThrottle):
+    """Throttle a scope per client IP and per submitted email."""
+
+    scope = None
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.num_requests, self.duration = SimpleRateThrottle.parse_rate(self, rate)
+        self.delay = 0
+
+    def get_keys(self, request):
+        keys = [f'{self.scope}:ip:{self.get_ident(request)}']
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if isinstance(email, str) and email.strip():
+            keys.append(f'{self.scope}:email:{email.strip().casefold()}')
+        return keys
+
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        store = get_store()
+        per_second = self.num_requests / self.duration
+        self.delay = max(store.take(key, self.num_requests, per_second) for key in self.get_keys(request))
+        return self.delay == 0
+
+    def wait(self):
+        return self.delay or None
+
+
+class LoginRateThrottle(IPEmailRateThrottle):
+    scope = 'login'
+
+
+class RegisterRateThrottle(IPEmailRateThrottle):
+    scope = 'register'
+
+
+class VerifyEmailRateThrottle(IPEmailRateThrottle):
+    scope = 'verify_email'
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, VerifyEmailView, LoginView, ProfileView, FollowUserView, UnfollowUserView, ExploreView, LogoutView
+from .views import RegisterView, VerifyEmailView, LoginView, ProfileView, FollowUserView, UnfollowUserView, FollowStatusView, FollowersListView, FollowingListView, ExploreView, LogoutView
 
 
 urlpatterns = [
@@ -12,6 +12,9 @@ urlpatterns = [
     path("profile/", ProfileView.as_view(), name="profile"),
     path("follow/<int:user_id>/", FollowUserView.as_view(), name="follow_user"),
     path("unfollow/<int:user_id>/", UnfollowUserView.as_view(), name="unfollow_user"),
+    path("follow-status/", FollowStatusView.as_view(), name="follow_status"),
+    path("<int:user_id>/followers/", FollowersListView.as_view(), name="user_followers"),
+    path("<int:user_id>/following/", FollowingListView.as_view(), name="user_following"),
     path("explore/", ExploreView.as_view(), name="explore"),
     
 ]
@@ -3,14 +3,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import EmailVerificationCode
-import random
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from .serializers import ProfileSerializer
-from .models import Follow
-from .serializers import FollowSerializer, ExploreSerializer
+from .models import Follow, EXPLORE_ACCOUNT_TYPES, EXPLORE_MIN_FOLLOWERS
+from .serializers import FollowSerializer, ExploreSerializer, FollowerListSerializer, FollowingListSerializer
+from .serializers import SLIM_USER_FIELDS
+from core.pagination import KeysetPagination
+from django.http import Http404
+from core.models import Location
+from .follows import follow_status, MAX_IDS
+from .throttling import LoginRateThrottle, RegisterRateThrottle, VerifyEmailRateThrottle
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import generics, filters
 from django.db.models import Q
@@ -20,6 +25,9 @@ User = get_user_model()
 
 
 class RegisterView(APIView):
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterRateThrottle]
+
     def post(self, request):
         email = request.data.get("email")
 
@@ -30,11 +38,8 @@ class RegisterView(APIView):
         # Check if user already exists
         user, created = User.objects.get_or_create(email=email)
 
-        # Generate a random 6-digit code
-        code = random.randint(100000, 999999)
-
-        # Save verification code
-        EmailVerificationCode.objects.create(user=user, code=str(code))
+        # Replace any active code with a fresh one (only its hash is stored)
+        code = EmailVerificationCode.issue(user)
 
         # (Optional) Send the code to user email (we’ll implement actual sending later)
         print(f"Verification code for {email}: {code}")  # Debug only
@@ -46,6 +51,9 @@ class RegisterView(APIView):
 
 
 class VerifyEmailView(APIView):
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [VerifyEmailRateThrottle]
+
     def post(self, request):
         email = request.data.get("email")
         code = request.data.get("code")
@@ -56,40 +64,18 @@ class VerifyEmailView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            return Response(
-                {"error": "User not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        try:
-            verification = EmailVerificationCode.objects.filter(
-                user=user, code=code, is_used=False
-            ).latest("created_at")
-        except EmailVerificationCode.DoesNotExist:
+        # One indexed lookup on the code hash; also marks the code used
+        user = EmailVerificationCode.redeem(email, code)
+        if user is None:
             return Response(
                 {"error": "Invalid or expired verification code"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Optional: Add expiration (e.g. 10 minutes)
-        expiration_time = verification.created_at + timedelta(minutes=10)
-        if timezone.now() > expiration_time:
-            return Response(
-                {"error": "Verification code expired"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Mark code as used
-        verification.is_used = True
-        verification.save()
-
         # Mark user as verified and active
         user.is_verified = True
         user.is_active = True
-        user.save()
+        user.save(update_fields=["is_verified", "is_active"])
 
         return Response(
             {"message": "Email verified successfully. You can now log in."},
@@ -98,6 +84,9 @@ class VerifyEmailView(APIView):
         
         
 class LoginView(APIView):
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
+
     def post(self, request):
         email = request.data.get("email")
         password = request.data.get("password")
@@ -184,15 +173,68 @@ class FollowUserView(APIView):
         if request.user == target_user:
             return Response({"error": "You cannot follow yourself"}, status=400)
 
-        if Follow.objects.filter(follower=request.user, following=target_user).exists():
+        if not request.user.follow(target_user):
             return Response({"message": "Already following this user"}, status=400)
 
-        Follow.objects.create(follower=request.user, following=target_user)
-        target_user.followers_count = Follow.objects.filter(following=target_user).count()
-        target_user.save()
         return Response({"message": f"You are now following {target_user.username}"}, status=201)
 
 
+class FollowStatusView(APIView):
+    """
+    Follow state of the current user for a batch of ids, in one query.
+    params: ids (comma separated, at most MAX_IDS)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        raw = [part for part in request.query_params.get("ids", "").split(",") if part.strip()]
+        try:
+            ids = [int(part) for part in raw]
+        except ValueError:
+            return Response({"error": "ids must be a comma separated list of integers"}, status=400)
+        if len(ids) > MAX_IDS:
+            return Response({"error": f"At most {MAX_IDS} ids per request"}, status=400)
+
+        statuses = follow_status(request.user, ids)
+        return Response({str(pk): statuses[pk] for pk in ids})
+
+
+class FollowListView(generics.ListAPIView):
+    """
+    Base for the followers/following lists: keyset pages ordered by
+    (created_at, id) within one user, served by the Follow page indexes.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    # Follow field holding the listed user's id, and the one to display
+    owner_field = None
+    user_field = None
+
+    def get_queryset(self):
+        user_id = self.kwargs["user_id"]
+        if not User.objects.filter(pk=user_id).exists():
+            raise Http404("User not found")
+        slim = [f"{self.user_field}__{name}" for name in SLIM_USER_FIELDS]
+        return (
+            Follow.objects.filter(**{f"{self.owner_field}_id": user_id})
+            .select_related(self.user_field)
+            .only("id", "created_at", self.owner_field, self.user_field, *slim)
+            .order_by("-created_at", "-id")
+        )
+
+
+class FollowersListView(FollowListView):
+    serializer_class = FollowerListSerializer
+    owner_field = "following"
+    user_field = "follower"
+
+
+class FollowingListView(FollowListView):
+    serializer_class = FollowingListSerializer
+    owner_field = "follower"
+    user_field = "following"
+
+
 class UnfollowUserView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -201,29 +243,35 @@ class UnfollowUserView(APIView):
         if not target_user:
             return Response({"error": "User not found"}, status=404)
 
-        follow = Follow.objects.filter(follower=request.user, following=target_user)
-        if not follow.exists():
+        if not request.user.unfollow(target_user):
             return Response({"error": "You are not following this user"}, status=400)
 
-        follow.delete()
-        target_user.followers_count = Follow.objects.filter(following=target_user).count()
-        target_user.save()
         return Response({"message": f"You have unfollowed {target_user.username}"}, status=200)
     
     
-class ExploreView(APIView):
+class ExploreView(generics.ListAPIView):
+    """
+    Business/premium accounts with at least EXPLORE_MIN_FOLLOWERS followers,
+    most followed first. Keyset-paginated on (-followers_count, id), which
+    the composite user_explore_idx index (-followers_count, id, account_type)
+    serves directly.
+    params: q, country, region, city, category
+    """
     permission_classes = [IsAuthenticated]
+    serializer_class = ExploreSerializer
+    pagination_class = KeysetPagination
 
-    def get(self, request):
-        query = request.query_params.get("q", "")
-        country = request.query_params.get("country", "")
-        region = request.query_params.get("region", "")
-        city = request.query_params.get("city", "")
-        category = request.query_params.get("category", "")
+    def get_queryset(self):
+        params = self.request.query_params
+        query = params.get("q", "")
+        country = params.get("country", "")
+        region = params.get("region", "")
+        city = params.get("city", "")
+        category = params.get("category", "")
 
         users = User.objects.filter(
-            Q(account_type__in=["business", "premium"]) &
-            Q(followers_count__gte=20)
+            account_type__in=EXPLORE_ACCOUNT_TYPES,
+            followers_count__gte=EXPLORE_MIN_FOLLOWERS,
         )
 
         if query:
@@ -231,14 +279,14 @@ class ExploreView(APIView):
                 Q(username__icontains=query) |
                 Q(business_name__icontains=query)
             )
+        # Exact match on the normalized, indexed location rows
         if country:
-            users = users.filter(country__icontains=country)
+            users = users.filter(country_ref__key=Location.normalize(country))
         if region:
-            users = users.filter(region__icontains=region)
+            users = users.filter(region_ref__key=Location.normalize(region))
         if city:
-            users = users.filter(city__icontains=city)
+            users = users.filter(city_ref__key=Location.normalize(city))
         if category:
             users = users.filter(business_category__icontains=category)
 
-        serializer = ExploreSerializer(users, many=True)
-        return Response(serializer.data)
+        return users.order_by("-followers_count", "id")
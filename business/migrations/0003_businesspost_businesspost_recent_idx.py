@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0002_businesspost'),
+        ('mediafiles', '0002_remove_status_media_remove_status_user_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='businesspost',
+            index=models.Index(fields=['-created_at', '-id'], name='businesspost_recent_idx'),
+        ),
+    ]
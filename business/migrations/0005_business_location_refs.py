@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+LEVELS = ('country', 'region', 'city')
+REF_FIELDS = ('country_ref', 'region_ref', 'city_ref')
+
+
+# ✅ Frozen copy of core.locations at the time of this migration, so later
+# changes there don't change what it does
+def normalize(text):
+    return ' '.join((text or '').split()).casefold()
+
+
+def resolve(Location, country, region, city, memo):
+    refs = []
+    parent = None
+    for level, name in zip(LEVELS, (country, region, city)):
+        key = normalize(name)
+        if not key:
+            refs.append(None)
+            continue
+        memo_key = (level, parent.pk if parent else None, key)
+        location = memo.get(memo_key)
+        if location is None:
+            location, _ = Location.objects.get_or_create(
+                level=level, parent=parent, key=key,
+                defaults={'name': ' '.join(name.split())},
+            )
+            memo[memo_key] = location
+        refs.append(location)
+        parent = location
+    return refs
+
+
+def backfill_locations(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Business = apps.get_model('business', 'Business')
+    Location = apps.get_model('core', 'Location')
+
+    memo = {}
+    combos = User.objects.order_by().values_list('country', 'region', 'city').distinct()
+    for country, region, city in list(combos):
+        refs = resolve(Location, country, region, city, memo)
+        User.objects.filter(country=country, region=region, city=city).update(
+            **{f'{field}_id': ref.pk if ref else None for field, ref in zip(REF_FIELDS, refs)}
+        )
+
+    owners = User.objects.filter(pk=OuterRef('owner_id'))
+    Business.objects.update(**{
+        field: Subquery(owners.values(f'{field}_id')[:1]) for field in REF_FIELDS
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0004_business_rank_score'),
+        ('core', '0001_location'),
+        ('accounts', '0007_user_location_refs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.location'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='country_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.location'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='region_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.location'),
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0005_business_location_refs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='rank_prior',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,12 +1,25 @@
 # business/models.py
 
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 from django.utils.text import slugify
 from mediafiles.models import MediaFile
 
 User = settings.AUTH_USER_MODEL
 
+class BusinessQuerySet(models.QuerySet):
+    def with_stats(self):
+        """
+        Load the owner and annotate followers_count / avg_rating in the same
+        query, from the owner's follower counter and RatingAggregate.
+        """
+        return self.select_related('owner').annotate(
+            followers_count=F('owner__followers_count'),
+            avg_rating=F('owner__rating_aggregate__average'),
+        )
+
+
 class Business(models.Model):
     owner = models.OneToOneField(User, on_delete=models.CASCADE, related_name='business')
     name = models.CharField(max_length=200, unique=True)
@@ -21,10 +34,29 @@ class Business(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, blank=True)
+    # Precomputed by explore.ranking; drives TopRatedBusinessesView
+    rank_score = models.FloatField(default=0.0)
+    # Site-wide mean rating rank_score was computed against
+    rank_prior = models.FloatField(null=True, blank=True)
+    # Copy of the owner's normalized location (see accounts.User.save)
+    country_ref = models.ForeignKey('core.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    region_ref = models.ForeignKey('core.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    city_ref = models.ForeignKey('core.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    objects = BusinessQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rank_score', '-created_at', '-id'], name='business_rank_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if self._state.adding:
+            self.country_ref_id = self.owner.country_ref_id
+            self.region_ref_id = self.owner.region_ref_id
+            self.city_ref_id = self.owner.city_ref_id
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -51,5 +83,10 @@ class BusinessPost(models.Model):
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='liked_posts', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='businesspost_recent_idx'),
+        ]
+
     def __str__(self):
         return f"{self.business.name} post by {self.author.username}"
\ No newline at end of file
@@ -2,11 +2,13 @@ from rest_framework import generics, permissions
 from rest_framework.response import Response
 from .models import BusinessPost
 from .serializers import BusinessPostSerializer
+from core.pagination import KeysetPagination
 
 class BusinessPostListCreateView(generics.ListCreateAPIView):
     queryset = BusinessPost.objects.all().order_by('-created_at')
     serializer_class = BusinessPostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
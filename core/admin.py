@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Location
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'level', 'parent', 'key')
+    list_filter = ('level',)
+    search_fields = ('name', 'key')
+    raw_id_fields = ('parent',)
@@ -0,0 +1,67 @@
+"""
+Helpers for the normalized Location hierarchy (core.models.Location).
+
+They take the model classes as arguments; business migration 0005 keeps its
+own frozen copy of them.
+"""
+
+from django.db.models import OuterRef, Subquery
+
+LEVELS = ('country', 'region', 'city')
+REF_FIELDS = ('country_ref', 'region_ref', 'city_ref')
+
+
+def normalize(text):
+    """Lookup key for a location name: trimmed, single-spaced, casefolded."""
+    return ' '.join((text or '').split()).casefold()
+
+
+def resolve(location_model, country, region, city, memo=None):
+    """
+    Location rows (or None) for the given names, each parented to the
+    previous non-empty level. `memo` caches rows across calls.
+    """
+    refs = []
+    parent = None
+    for level, name in zip(LEVELS, (country, region, city)):
+        key = normalize(name)
+        if not key:
+            refs.append(None)
+            continue
+        memo_key = (level, parent.pk if parent else None, key)
+        location = memo.get(memo_key) if memo is not None else None
+        if location is None:
+            location, _ = location_model.objects.get_or_create(
+                level=level, parent=parent, key=key,
+                defaults={'name': ' '.join(name.split())},
+            )
+            if memo is not None:
+                memo[memo_key] = location
+        refs.append(location)
+        parent = location
+    return tuple(refs)
+
+
+def backfill(user_model, business_model, location_model):
+    """
+    Point every user's and business's location foreign keys at the rows
+    matching their free-text country/region/city. One UPDATE per distinct
+    combination of values, then one UPDATE for all businesses.
+    Returns the number of users updated.
+    """
+    memo = {}
+    updated = 0
+    combos = (
+        user_model.objects.order_by().values_list('country', 'region', 'city').distinct()
+    )
+    for country, region, city in list(combos):
+        refs = resolve(location_model, country, region, city, memo)
+        updated += user_model.objects.filter(country=country, region=region, city=city).update(
+            **{f'{field}_id': ref.pk if ref else None for field, ref in zip(REF_FIELDS, refs)}
+        )
+
+    owners = user_model.objects.filter(pk=OuterRef('owner_id'))
+    business_model.objects.update(**{
+        field: Subquery(owners.values(f'{field}_id')[:1]) for field in REF_FIELDS
+    })
+    return updated
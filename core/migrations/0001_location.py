@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('country', 'Country'), ('region', 'Region'), ('city', 'City')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(db_index=True, max_length=100)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='core.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('level', 'parent', 'key'), name='location_unique_child'), models.UniqueConstraint(condition=models.Q(('parent__isnull', True)), fields=('level', 'key'), name='location_unique_root')],
+            },
+        ),
+    ]
@@ -1,3 +1,43 @@
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from core.locations import normalize, resolve
+
+
+# ✅ LOCATION HIERARCHY
+# country -> region -> city, deduplicated on a normalized key so that
+# "Lagos" and "lagos " are the same row. User and Business point at these
+# with indexed foreign keys; the free-text columns stay for display.
+
+class Location(models.Model):
+    COUNTRY = 'country'
+    REGION = 'region'
+    CITY = 'city'
+    LEVELS = [
+        (COUNTRY, 'Country'),
+        (REGION, 'Region'),
+        (CITY, 'City'),
+    ]
+
+    level = models.CharField(max_length=10, choices=LEVELS)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['level', 'parent', 'key'], name='location_unique_child'),
+            models.UniqueConstraint(
+                fields=['level', 'key'], condition=Q(parent__isnull=True), name='location_unique_root'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    normalize = staticmethod(normalize)
+
+    @classmethod
+    def resolve(cls, country, region, city):
+        """(country, region, city) Location rows for free-text values, created as needed."""
+        return resolve(cls, country, region, city)
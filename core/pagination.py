@@ -0,0 +1,224 @@
+"""
+Keyset (seek) pagination shared by the listing endpoints.
+
+Pages are located with a WHERE clause on the queryset's own ordering keys
+instead of OFFSET, and no COUNT(*) is issued, so deep pages cost the same
+as the first one. Opt a view in with `pagination_class = KeysetPagination`;
+the ordering is taken from the queryset (or the model's Meta.ordering) and
+the primary key is appended as a tie-breaker. NULLs in nullable keys (and
+in annotations, which may come from outer joins) sort after every value.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+CURSOR_VERSION = 1
+
+
+# ---------- Cursor encoding ----------
+# Cursors only hold the ordering field names and the boundary row's values,
+# tagged by type. They are not signed with SECRET_KEY, so they keep working
+# across deploys as long as the endpoint's ordering is unchanged.
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['dec', str(value)]
+    return ['v', value]
+
+
+def _load_value(item):
+    tag, value = item
+    if tag == 'dt':
+        return parse_datetime(value)
+    if tag == 'd':
+        return parse_date(value)
+    if tag == 'dec':
+        return Decimal(value)
+    if tag == 'v':
+        return value
+    raise ValueError(tag)
+
+
+def encode_cursor(fields, values, reverse=False):
+    payload = {
+        'v': CURSOR_VERSION,
+        'o': fields,
+        'k': [_dump_value(value) for value in values],
+        'r': reverse,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Return (values, reverse) or raise NotFound for a foreign/broken cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload['v'] != CURSOR_VERSION or payload['o'] != fields:
+            raise ValueError('cursor does not match this ordering')
+        values = [_load_value(item) for item in payload['k']]
+        if len(values) != len(fields):
+            raise ValueError('cursor has the wrong number of keys')
+        return values, bool(payload['r'])
+    except (TypeError, ValueError, KeyError, binascii.Error):
+        raise NotFound('Invalid cursor')
+
+
+# ---------- Pagination ----------
+class KeysetPagination(BasePagination):
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering(queryset)
+        self.nullable = self.get_nullable(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if cursor:
+            values, reverse = decode_cursor(cursor, self.fields)
+            queryset = queryset.filter(self.seek(values, reverse))
+
+        rows = list(queryset.order_by(*self.order_by(reverse))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going forward there is a previous page whenever we came from a
+        # cursor; going backwards there is always a next page.
+        self.has_next = has_more if not reverse else True
+        self.has_previous = bool(cursor) if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """Ordering keys of the queryset, ending with the primary key."""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        fields = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?' or LOOKUP_SEP in item:
+                raise ImproperlyConfigured(
+                    'KeysetPagination needs plain field or annotation names to order by, '
+                    f'got {item!r}.'
+                )
+            name = item.lstrip('-')
+            if name == queryset.model._meta.pk.name:
+                item = item.replace(name, 'pk')
+            fields.append(item)
+        if not any(f.lstrip('-') == 'pk' for f in fields):
+            fields.append('-pk' if fields and fields[-1].startswith('-') else 'pk')
+        return fields
+
+    def get_nullable(self, queryset):
+        """Ordering keys that may hold NULL."""
+        nullable = set()
+        for field in self.fields:
+            name = field.lstrip('-')
+            if name in queryset.query.annotations:
+                nullable.add(name)
+                continue
+            try:
+                if name != 'pk' and queryset.model._meta.get_field(name).null:
+                    nullable.add(name)
+            except FieldDoesNotExist:
+                nullable.add(name)
+        return nullable
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def order_by(self, reverse):
+        """ORDER BY terms; NULLs go last forwards and so first backwards."""
+        ordering = []
+        for field in self.fields:
+            field = self.invert(field) if reverse else field
+            name = field.lstrip('-')
+            if name not in self.nullable:
+                ordering.append(field)
+                continue
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            ordering.append(F(name).desc(**nulls) if field.startswith('-') else F(name).asc(**nulls))
+        return ordering
+
+    def seek(self, values, reverse):
+        """
+        WHERE clause selecting rows strictly after the boundary row:
+        (a > x) OR (a = x AND b > y) OR ... with '<' for descending keys.
+        For nullable keys NULL counts as past every value going forwards
+        and before every value going backwards.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.fields, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            if value is None:
+                if reverse:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            after = Q(**{f'{name}__{lookup}': value})
+            if name in self.nullable and not reverse:
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def cursor_for(self, row, reverse):
+        values = [getattr(row, f.lstrip('-')) for f in self.fields]
+        return encode_cursor(self.fields, values, reverse)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.cursor_for(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.cursor_for(self.page[0], True))
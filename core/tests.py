@@ -1,3 +1,79 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.db.models import F
 from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from core.models import Location
+from core.pagination import KeysetPagination
+from products.models import Product, ProductCategory
+
+
+class KeysetPaginationNullTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', email='seller@example.com')
+        category = ProductCategory.objects.create(business=seller, name='Shoes')
+        notes = ['b', None, 'a', None, 'c', None, 'a']
+        Product.objects.bulk_create([
+            Product(category=category, name=f'p{i}', price=1, description=note)
+            for i, note in enumerate(notes)
+        ])
+
+    def page(self, queryset, cursor=None):
+        params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+        request = Request(APIRequestFactory().get('/', params))
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(queryset, request)
+        return paginator, [row.pk for row in rows]
+
+    @staticmethod
+    def cursor(link):
+        return parse_qs(urlparse(link).query)['cursor'][0] if link else None
+
+    def test_pages_through_null_keys_in_both_directions(self):
+        queryset = Product.objects.annotate(note=F('description')).order_by('-note')
+        expected = [p.pk for p in queryset.order_by(F('note').desc(nulls_last=True), '-pk')]
+
+        seen, pages, cursor = [], [], None
+        while True:
+            paginator, ids = self.page(queryset, cursor)
+            seen += ids
+            pages.append((ids, paginator))
+            cursor = self.cursor(paginator.get_next_link())
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+
+        # Walk back from the last page with the previous links
+        ids, paginator = pages[-1]
+        back = ids
+        cursor = self.cursor(paginator.get_previous_link())
+        while cursor:
+            paginator, ids = self.page(queryset, cursor)
+            back = ids + back
+            cursor = self.cursor(paginator.get_previous_link())
+        self.assertEqual(back, expected)
+
+
+class LocationResolveTests(TestCase):
+    def test_names_are_matched_on_their_normalized_key(self):
+        country, region, city = Location.resolve(' Kenya ', 'Nairobi  County', 'Nairobi')
+        self.assertEqual((country.name, country.key), ('Kenya', 'kenya'))
+        self.assertEqual((region.parent, city.parent), (country, region))
+        self.assertEqual(Location.resolve('KENYA', 'nairobi county', 'NAIROBI'), (country, region, city))
+        self.assertEqual(Location.objects.count(), 3)
+
+    def test_same_name_under_another_parent_is_a_separate_row(self):
+        _, _, springfield_il = Location.resolve('USA', 'Illinois', 'Springfield')
+        _, _, springfield_ma = Location.resolve('USA', 'Massachusetts', 'Springfield')
+        self.assertNotEqual(springfield_il, springfield_ma)
+        self.assertEqual(Location.objects.filter(level=Location.COUNTRY).count(), 1)
 
-# Create your tests here.
+    def test_blank_levels_are_skipped(self):
+        country, region, city = Location.resolve('Kenya', '  ', 'Mombasa')
+        self.assertIsNone(region)
+        self.assertEqual(city.parent, country)
+        self.assertEqual(Location.resolve('', None, ''), (None, None, None))
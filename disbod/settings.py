@@ -192,13 +192,19 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Scopes used by accounts.throttling (per IP and per email)
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'register': '5/hour',
+        'verify_email': '10/min',
+    },
 }
 
 
@@ -215,6 +221,34 @@ SIMPLE_JWT = {
 }
 
 
+# ✅ AUTH USER CACHE (accounts.authentication.CachedJWTAuthentication)
+# SHARED_CACHE: name of a CACHES alias to share snapshots across processes
+
+AUTH_USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+    'SHARED_CACHE': None,
+}
+
+
+# ✅ AUTH THROTTLING (accounts.throttling)
+# MAX_KEYS bounds the in-process bucket store; SHARED_CACHE switches to
+# sliding-window counters in that CACHES alias
+
+AUTH_THROTTLE = {
+    'MAX_KEYS': 100000,
+    'SHARED_CACHE': None,
+}
+
+
+# ✅ EMAIL VERIFICATION CODES
+# Codes expire after this many minutes; purge_verification_codes deletes them.
+# A code is rejected after this many wrong guesses until a new one is issued.
+
+EMAIL_VERIFICATION_CODE_TTL_MINUTES = 10
+EMAIL_VERIFICATION_CODE_MAX_ATTEMPTS = 5
+
+
 # ✅ MEDIA FILES
 
 MEDIA_URL = '/media/'
@@ -224,3 +258,83 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # ✅ CORS SETTINGS (if using React or frontend later)
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+
+# ✅ EXPLORE SEARCH INDEX
+# The backend defaults to SQLiteFTS5Backend on SQLite and to the unindexed
+# ScanSearchBackend elsewhere; set EXPLORE_SEARCH_BACKEND to override
+
+EXPLORE_SEARCH_MAX_RESULTS = 500
+EXPLORE_FACET_CACHE_TIMEOUT = 60 * 5
+
+
+# ✅ EXPLORE AUTOCOMPLETE (explore.autocomplete)
+# Each process rebuilds its prefix index after TTL seconds; with SHARED_CACHE
+# set, changes made in one process reach the others on their next lookup
+
+EXPLORE_AUTOCOMPLETE = {
+    'TTL': 300,
+    'SHARED_CACHE': None,
+}
+
+
+# ✅ TRENDING PRODUCTS
+# Scores are only recomputed by `manage.py refresh_trending`; run it from
+# cron (e.g. */10 * * * *) or as a worker with --interval 600
+
+TRENDING_WINDOWS = (1, 7, 30)
+TRENDING_HALF_LIFE_HOURS = 48
+
+
+# ✅ EXPLORE RANKING
+# BayesianAverage, WilsonLowerBound or FollowerWeightedBlend from explore.ranking
+
+EXPLORE_RANKING_STRATEGY = 'explore.ranking.BayesianAverage'
+
+
+# ✅ SUGGESTED BUSINESSES
+
+SUGGESTIONS_TTL_HOURS = 24
+
+
+# ✅ PRODUCT VIEW INGESTION (products.ingest)
+# Views are buffered in memory and written every FLUSH_INTERVAL seconds or
+# once FLUSH_SIZE events are waiting; MAX_EVENTS bounds the buffer
+
+PRODUCT_VIEW_BUFFER = {
+    'MAX_EVENTS': 50000,
+    'FLUSH_SIZE': 1000,
+    'FLUSH_INTERVAL': 5,
+}
+
+
+# ✅ PRODUCT VIEW ROLLUPS (products.rollups)
+# compact_product_views drops hourly rollups and raw ProductView rows older
+# than these; daily rollups are kept
+
+PRODUCT_VIEW_ROLLUPS = {
+    'HOURLY_RETENTION_DAYS': 14,
+    'RAW_RETENTION_DAYS': 90,
+}
+
+
+# ✅ PRODUCT BULK IMPORT/EXPORT (products.bulk)
+# Imports are written CHUNK_SIZE rows per transaction (?chunk_size= may ask
+# for up to MAX_CHUNK_SIZE); exports fetch EXPORT_CHUNK_SIZE rows at a time
+
+PRODUCT_BULK = {
+    'CHUNK_SIZE': 500,
+    'MAX_CHUNK_SIZE': 5000,
+    'EXPORT_CHUNK_SIZE': 2000,
+}
+
+
+# ✅ IMAGE VARIANTS (mediafiles.variants)
+# Uploaded images get WebP copies scaled to fit each SIZES box, written by
+# WORKERS background threads (or on first request if still missing)
+
+IMAGE_VARIANTS = {
+    'SIZES': {'thumb': 160, 'small': 480, 'medium': 960},
+    'QUALITY': 80,
+    'WORKERS': 2,
+}
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import FeaturedBusiness, TrendingProductCache
+from .models import FeaturedBusiness, TrendingProductCache, SuggestedBusiness
 
 @admin.register(FeaturedBusiness)
 class FeaturedBusinessAdmin(admin.ModelAdmin):
@@ -10,5 +10,12 @@ class FeaturedBusinessAdmin(admin.ModelAdmin):
 
 @admin.register(TrendingProductCache)
 class TrendingProductCacheAdmin(admin.ModelAdmin):
-    list_display = ('product', 'score', 'last_calculated')
+    list_display = ('product', 'window_days', 'score', 'last_calculated')
+    list_filter = ('window_days',)
     search_fields = ('product__name', 'product__category__name')
+
+
+@admin.register(SuggestedBusiness)
+class SuggestedBusinessAdmin(admin.ModelAdmin):
+    list_display = ('user', 'suggested', 'score', 'computed_at')
+    search_fields = ('user__username', 'suggested__username')
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ExploreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'explore'
+
+    def ready(self):
+        from explore.ranking import resolve_ranking_inputs
+
+        # Follower/rating sources for ranking, resolved once at startup
+        self.ranking_inputs = resolve_ranking_inputs()
+        import explore.signals  # noqa: F401
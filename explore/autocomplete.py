@@ -0,0 +1,189 @@
+"""
+In-memory typeahead index for Explore.
+
+Business, product and category names are kept in sorted arrays keyed by the
+normalized text starting at each word, so a prefix lookup is a bisect plus a
+short scan and never touches the database. Matches come back in alphabetical
+order of the matched text; there is no popularity ranking.
+
+The index is built lazily on the first lookup and kept current by the
+save/delete signals in explore.signals. Those only run in the process that
+made the change, so every process also rebuilds its copy once it is TTL
+seconds old. With SHARED_CACHE set, each change also stores a new version
+stamp in that cache, and a lookup that sees a stamp other than its own
+rebuilds right away. Settings (all optional), e.g.:
+    EXPLORE_AUTOCOMPLETE = {'TTL': 300, 'SHARED_CACHE': 'default'}
+"""
+
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'explore:autocomplete:version'
+
+
+def get_autocomplete_settings():
+    return {'TTL': 300, 'SHARED_CACHE': None, **getattr(settings, 'EXPLORE_AUTOCOMPLETE', {})}
+
+
+def normalize(text):
+    return ' '.join((text or '').split()).casefold()
+
+
+def word_starts(text):
+    """Every suffix of the normalized text that starts at a word boundary."""
+    norm = normalize(text)
+    return [norm[m.start():] for m in re.finditer(r'\w+', norm)]
+
+
+class PrefixIndex:
+    """Sorted (key, id) entries with a side table of display labels."""
+
+    def __init__(self):
+        self._entries = []
+        self._labels = {}
+
+    def __len__(self):
+        return len(self._labels)
+
+    @classmethod
+    def build(cls, rows):
+        """An index over (pk, label) rows, sorted once rather than per insert."""
+        index = cls()
+        for pk, label in rows:
+            index._labels[pk] = label
+            index._entries.extend((key, pk) for key in word_starts(label))
+        index._entries.sort()
+        return index
+
+    def add(self, pk, label):
+        self.remove(pk)
+        self._labels[pk] = label
+        for key in word_starts(label):
+            insort(self._entries, (key, pk))
+
+    def remove(self, pk):
+        label = self._labels.pop(pk, None)
+        if label is None:
+            return
+        for key in word_starts(label):
+            i = bisect_left(self._entries, (key, pk))
+            if i < len(self._entries) and self._entries[i] == (key, pk):
+                del self._entries[i]
+
+    def search(self, prefix, limit, distinct_labels=False):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        i = bisect_left(self._entries, (prefix,))
+        while i < len(self._entries) and len(results) < limit:
+            key, pk = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            label = self._labels[pk]
+            marker = normalize(label) if distinct_labels else pk
+            if marker not in seen:
+                seen.add(marker)
+                results.append({'id': pk, 'name': label})
+            i += 1
+        return results
+
+
+class AutocompleteIndex:
+    """Prefix indexes for businesses, products and categories."""
+
+    kinds = ('businesses', 'products', 'categories')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = None
+        self._loaded_at = 0.0
+        self._version = None
+
+    @property
+    def loaded(self):
+        return self._indexes is not None
+
+    @property
+    def shared(self):
+        alias = get_autocomplete_settings()['SHARED_CACHE']
+        return caches[alias] if alias else None
+
+    def load(self):
+        from business.models import Business
+        from products.models import Product, ProductCategory
+
+        sources = (
+            ('businesses', Business.objects.values_list('pk', 'name')),
+            ('products', Product.objects.values_list('pk', 'name')),
+            ('categories', ProductCategory.objects.values_list('pk', 'name')),
+        )
+        # Read the stamp first: a change landing during the build leaves a
+        # newer stamp behind, so the next lookup rebuilds again
+        shared = self.shared
+        self._version = shared.get(VERSION_KEY) if shared is not None else None
+        self._indexes = {
+            kind: PrefixIndex.build(rows.iterator(chunk_size=2000))
+            for kind, rows in sources
+        }
+        self._loaded_at = time.monotonic()
+
+    def is_current(self):
+        if self._indexes is None:
+            return False
+        if time.monotonic() - self._loaded_at > get_autocomplete_settings()['TTL']:
+            return False
+        shared = self.shared
+        return shared is None or shared.get(VERSION_KEY) == self._version
+
+    def ensure_loaded(self):
+        if not self.is_current():
+            with self._lock:
+                if not self.is_current():
+                    self.load()
+
+    def publish(self):
+        """Tell other processes their copy is outdated. Call with the lock held."""
+        shared = self.shared
+        if shared is None:
+            return
+        previous = shared.get(VERSION_KEY)
+        version = uuid.uuid4().hex
+        shared.set(VERSION_KEY, version, None)
+        if previous != self._version:
+            # Someone else changed it since our build; pick that up too
+            self._indexes = None
+        else:
+            self._version = version
+
+    def update(self, kind, pk, name):
+        with self._lock:
+            # Not loaded yet: the first lookup will read the current rows anyway
+            if self._indexes is not None:
+                self._indexes[kind].add(pk, name)
+            self.publish()
+
+    def remove(self, kind, pk):
+        with self._lock:
+            if self._indexes is not None:
+                self._indexes[kind].remove(pk)
+            self.publish()
+
+    def lookup(self, prefix, limit=5):
+        self.ensure_loaded()
+        with self._lock:
+            if self._indexes is None:
+                self.load()
+            return {
+                kind: self._indexes[kind].search(prefix, limit, distinct_labels=(kind == 'categories'))
+                for kind in self.kinds
+            }
+
+
+index = AutocompleteIndex()
@@ -0,0 +1,84 @@
+"""
+Filter dimensions and facet counts for ExploreSearchView.
+
+Each dimension maps a query parameter to the field it groups on and the
+lookup used to filter it. Location dimensions go through the normalized
+core.Location rows and match exactly on their indexed key. Facet counts
+for a dimension are computed with every other active filter applied (but
+not its own), so the client can see which alternative values would still
+return results. That is one grouped query per dimension, since each one
+drops a different filter. Results are cached per query and filter values
+(as apply_filters uses them) for EXPLORE_FACET_CACHE_TIMEOUT seconds.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+
+from core.locations import normalize
+
+FACET_LIMIT = 20
+DEFAULT_CACHE_TIMEOUT = 60 * 5
+
+# param: (group-by field, filter lookup)
+BUSINESS_DIMENSIONS = {
+    'category': ('category', 'category__icontains'),
+    'country': ('country_ref__name', 'country_ref__key'),
+    'region': ('region_ref__name', 'region_ref__key'),
+    'city': ('city_ref__name', 'city_ref__key'),
+}
+
+PRODUCT_DIMENSIONS = {
+    'category': ('category__name', 'category__name__icontains'),
+    'country': ('category__business__country_ref__name', 'category__business__country_ref__key'),
+    'region': ('category__business__region_ref__name', 'category__business__region_ref__key'),
+    'city': ('category__business__city_ref__name', 'category__business__city_ref__key'),
+}
+
+# Filtered by exact normalized key rather than icontains
+LOCATION_DIMENSIONS = {'country', 'region', 'city'}
+
+
+def filter_value(name, value):
+    """The value a dimension's lookup is actually given."""
+    return normalize(value) if name in LOCATION_DIMENSIONS else value
+
+
+def apply_filters(qs, dimensions, filters, skip=None):
+    for name, value in filters.items():
+        if name != skip and name in dimensions:
+            qs = qs.filter(**{dimensions[name][1]: filter_value(name, value)})
+    return qs
+
+
+def facet_counts(base_qs, dimensions, filters, limit=FACET_LIMIT):
+    """{param: [{'value': ..., 'count': ...}, ...]} for every dimension."""
+    facets = {}
+    for name, (field, lookup) in dimensions.items():
+        # Locations group on the normalized key so the same place under
+        # different parents is counted once
+        group = lookup if name in LOCATION_DIMENSIONS else field
+        rows = (
+            apply_filters(base_qs, dimensions, filters, skip=name)
+            .exclude(Q(**{f'{field}__isnull': True}) | Q(**{field: ''}))
+            .order_by().values(group).annotate(count=Count('pk'), label=Min(field))
+            .order_by('-count', group)[:limit]
+        )
+        facets[name] = [{'value': row['label'], 'count': row['count']} for row in rows]
+    return facets
+
+
+def cached_facets(kind, q, filters, compute):
+    """Return compute() memoized on (kind, q, filter values as applied)."""
+    key_source = json.dumps(
+        [kind, q, sorted((k, filter_value(k, v)) for k, v in filters.items())]
+    )
+    key = 'explore:facets:' + hashlib.md5(key_source.encode()).hexdigest()
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute()
+        cache.set(key, facets, getattr(settings, 'EXPLORE_FACET_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT))
+    return facets
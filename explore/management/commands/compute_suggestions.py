@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from explore import suggestions
+
+
+class Command(BaseCommand):
+    help = "Precompute personalized business suggestions into SuggestedBusiness."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=20, help="Suggestions stored per user.")
+        parser.add_argument(
+            '--stale-only', action='store_true',
+            help="Only recompute users whose suggestions are older than SUGGESTIONS_TTL_HOURS.",
+        )
+
+    def handle(self, *args, **options):
+        processed = suggestions.refresh_all(
+            batch_size=options['batch_size'],
+            stale_only=options['stale_only'],
+            limit=options['limit'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Computed suggestions for {processed} users."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from explore import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Explore full-text search index from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = search.get_backend().rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} documents."))
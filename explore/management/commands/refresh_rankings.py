@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from explore import ranking
+
+
+class Command(BaseCommand):
+    help = "Recompute Business.rank_score for every business."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = ranking.refresh_all_ranks(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Ranked {updated} businesses."))
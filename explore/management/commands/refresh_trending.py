@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from explore import trending
+
+
+class Command(BaseCommand):
+    help = "Recompute trending product scores into TrendingProductCache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int, action='append', dest='windows',
+            help="Window in days to refresh (repeatable). Defaults to TRENDING_WINDOWS.",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and refresh every N seconds.",
+        )
+
+    def handle(self, *args, **options):
+        if options['interval']:
+            self.stdout.write(f"Refreshing trending scores every {options['interval']}s...")
+            trending.run_periodically(options['interval'], windows=options['windows'])
+            return
+
+        written = trending.refresh_trending(options['windows'])
+        for window, count in written.items():
+            self.stdout.write(self.style.SUCCESS(f"{window}d window: {count} products scored."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0002_search_index'),
+        ('products', '0002_product_product_recent_idx_product_product_price_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingproductcache',
+            name='window_days',
+            field=models.PositiveSmallIntegerField(default=7),
+        ),
+        migrations.AlterField(
+            model_name='trendingproductcache',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_scores', to='products.product'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingproductcache',
+            unique_together={('product', 'window_days')},
+        ),
+        migrations.AddIndex(
+            model_name='trendingproductcache',
+            index=models.Index(fields=['window_days', '-score'], name='trending_window_score_idx'),
+        ),
+    ]
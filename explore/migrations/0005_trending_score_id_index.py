@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_zero_scores(apps, schema_editor):
+    """Give every product a 0 row per window, as refresh_trending now does."""
+    Product = apps.get_model('products', 'Product')
+    TrendingProductCache = apps.get_model('explore', 'TrendingProductCache')
+    windows = getattr(settings, 'TRENDING_WINDOWS', (1, 7, 30))
+    product_ids = list(Product.objects.order_by('pk').values_list('pk', flat=True))
+    for window in windows:
+        TrendingProductCache.objects.bulk_create(
+            [TrendingProductCache(product_id=pk, window_days=window) for pk in product_ids],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0004_suggestedbusiness'),
+        ('products', '0005_productviewsketch'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='trendingproductcache',
+            name='trending_window_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='trendingproductcache',
+            index=models.Index(fields=['window_days', '-score', '-id'], name='trending_window_score_idx'),
+        ),
+        migrations.RunPython(seed_zero_scores, migrations.RunPython.noop),
+    ]
@@ -18,10 +18,42 @@ class FeaturedBusiness(models.Model):
 
 
 class TrendingProductCache(models.Model):
-    """Cache structure for trending product calculations (optional)."""
-    product = models.OneToOneField('products.Product', on_delete=models.CASCADE, related_name='trend_cache')
+    """
+    Precomputed trending score of a product for one look-back window.
+    Written by explore.trending.refresh_trending; read by TrendingProductsView.
+    """
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='trend_scores')
+    window_days = models.PositiveSmallIntegerField(default=7)
     score = models.FloatField(default=0.0)
     last_calculated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        unique_together = ('product', 'window_days')
+        indexes = [
+            # TrendingProductsView pages by (-score, -id) within a window
+            models.Index(fields=['window_days', '-score', '-id'], name='trending_window_score_idx'),
+        ]
+
     def __str__(self):
         return f"{self.product.name} (score={self.score:.2f})"
+
+
+class SuggestedBusiness(models.Model):
+    """
+    Precomputed "businesses you may want to follow" for one user.
+    Rows are rebuilt in batches by explore.suggestions and expire after
+    settings.SUGGESTIONS_TTL_HOURS.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='business_suggestions')
+    suggested = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(default=0.0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', '-score'], name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.suggested} for {self.user} ({self.score:.2f})"
@@ -0,0 +1,237 @@
+"""
+Ranking engine for TopRatedBusinessesView.
+
+A strategy turns a business owner's rating totals and follower count into a
+single rank_score, which is stored on Business (indexed) so the endpoint is
+a plain ORDER BY. Scores are refreshed for one business at a time when its
+owner gets rated or followed (see explore.signals), and in bulk with
+`manage.py refresh_rankings`. The strategy is picked with
+settings.EXPLORE_RANKING_STRATEGY.
+
+The site-wide mean rating (the prior) is only recomputed by the bulk
+refresh, which stores it next to every score in Business.rank_prior; the
+per-business refresh reuses that stored prior, so all scores in the
+ordering are computed against the same mean.
+"""
+
+import math
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.module_loading import import_string
+
+DEFAULT_STRATEGY = 'explore.ranking.BayesianAverage'
+DEFAULT_PRIOR = 3.0
+
+
+# ---------- Strategies ----------
+class RankingStrategy:
+    """Maps (rating count, star total, followers, prior mean) to a score."""
+
+    def score(self, count, total, followers, prior):
+        raise NotImplementedError
+
+
+class BayesianAverage(RankingStrategy):
+    """
+    Average rating pulled towards the site-wide mean by `confidence`
+    phantom ratings, so a single 5-star review cannot beat hundreds of 4.8s.
+    """
+
+    def __init__(self, confidence=10):
+        self.confidence = confidence
+
+    def score(self, count, total, followers, prior):
+        return (self.confidence * prior + total) / (self.confidence + count)
+
+
+class WilsonLowerBound(RankingStrategy):
+    """
+    Lower bound of the Wilson score interval, treating a rating of s stars
+    as (s - 1) / 4 of a positive vote.
+    """
+
+    def __init__(self, z=1.96):
+        self.z = z
+
+    def score(self, count, total, followers, prior):
+        if not count:
+            return 0.0
+        z2 = self.z * self.z
+        p = (total - count) / (4.0 * count)
+        centre = p + z2 / (2 * count)
+        margin = self.z * math.sqrt((p * (1 - p) + z2 / (4 * count)) / count)
+        return (centre - margin) / (1 + z2 / count)
+
+
+class FollowerWeightedBlend(RankingStrategy):
+    """
+    Bayesian average (scaled to 0..1) blended with a saturating follower
+    signal: followers / (followers + follower_midpoint).
+    """
+
+    def __init__(self, follower_weight=0.3, follower_midpoint=100, confidence=10):
+        self.follower_weight = follower_weight
+        self.follower_midpoint = follower_midpoint
+        self.rating = BayesianAverage(confidence)
+
+    def score(self, count, total, followers, prior):
+        rating = (self.rating.score(count, total, followers, prior) - 1) / 4.0
+        reach = followers / (followers + self.follower_midpoint)
+        return (1 - self.follower_weight) * rating + self.follower_weight * reach
+
+
+_strategy = None
+
+
+def get_strategy():
+    global _strategy
+    if _strategy is None:
+        _strategy = import_string(getattr(settings, 'EXPLORE_RANKING_STRATEGY', DEFAULT_STRATEGY))()
+    return _strategy
+
+
+# ---------- Inputs ----------
+class RankingInputs:
+    """
+    Where the ranking signals live, resolved once from model metadata when
+    the explore app is ready (ExploreConfig.ready) instead of per request.
+    """
+
+    def __init__(self, follow_model, follower_fk, rating_relation, follower_counter=None):
+        self.follow_model = follow_model
+        # Follow field pointing at the followed user, e.g. 'following'
+        self.follower_fk = follower_fk
+        # Reverse one-to-one from User to RatingAggregate, e.g. 'rating_aggregate'
+        self.rating_relation = rating_relation
+        # Denormalized follower count column on User, if there is one
+        self.follower_counter = follower_counter
+
+    def follower_count(self, owner_ref='owner'):
+        """Followers of the user at `owner_ref`: counter column, else a correlated COUNT."""
+        if self.follower_counter:
+            return F(f'{owner_ref}__{self.follower_counter}')
+        followers = (
+            self.follow_model.objects.filter(**{self.follower_fk: OuterRef(owner_ref)})
+            .order_by().values(self.follower_fk).annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(followers, output_field=IntegerField()), 0)
+
+    def average_rating(self, owner_ref='owner'):
+        return Coalesce(F(f'{owner_ref}__{self.rating_relation}__average'), 0.0)
+
+    def annotations(self):
+        """Annotations BusinessListSerializer expects on a Business queryset."""
+        return {
+            'avg_rating': self.average_rating(),
+            'followers_count': self.follower_count(),
+        }
+
+
+def resolve_ranking_inputs():
+    """Introspect accounts.Follow and ratings.RatingAggregate."""
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    follow_model = apps.get_model('accounts', 'Follow')
+    aggregate_model = apps.get_model('ratings', 'RatingAggregate')
+
+    user_fks = [
+        f for f in follow_model._meta.get_fields()
+        if f.many_to_one and f.related_model is user_model
+    ]
+    followed = [f for f in user_fks if f.name == 'following']
+    if not followed:
+        raise ImproperlyConfigured("accounts.Follow needs a 'following' foreign key to the user model.")
+
+    rating_field = aggregate_model._meta.get_field('user')
+    user_fields = {f.name for f in user_model._meta.concrete_fields}
+    return RankingInputs(
+        follow_model=follow_model,
+        follower_fk=followed[0].name,
+        rating_relation=rating_field.related_query_name(),
+        follower_counter='followers_count' if 'followers_count' in user_fields else None,
+    )
+
+
+def get_ranking_inputs():
+    return apps.get_app_config('explore').ranking_inputs
+
+
+def global_prior():
+    """Site-wide mean star rating."""
+    from ratings.models import RatingAggregate
+
+    sums = RatingAggregate.objects.aggregate(count=Sum('count'), total=Sum('total'))
+    return sums['total'] / sums['count'] if sums['count'] else DEFAULT_PRIOR
+
+
+def stored_prior():
+    """The prior the current scores were computed with (by the last bulk refresh)."""
+    from business.models import Business
+
+    prior = Business.objects.exclude(rank_prior=None).values_list('rank_prior', flat=True).first()
+    return global_prior() if prior is None else prior
+
+
+def ranking_inputs(owner_id):
+    """(rating count, star total, followers) for one business owner."""
+    from ratings.models import RatingAggregate
+
+    inputs = get_ranking_inputs()
+    totals = RatingAggregate.objects.filter(user_id=owner_id).values_list('count', 'total').first()
+    count, total = totals or (0, 0)
+    if inputs.follower_counter:
+        followers = (
+            get_user_model().objects.filter(pk=owner_id)
+            .values_list(inputs.follower_counter, flat=True).first() or 0
+        )
+    else:
+        followers = inputs.follow_model.objects.filter(**{f'{inputs.follower_fk}_id': owner_id}).count()
+    return count, total, followers
+
+
+# ---------- Refresh ----------
+def refresh_business_rank(owner_id):
+    """Recompute rank_score of the business owned by `owner_id` (if any)."""
+    from business.models import Business
+
+    business = Business.objects.filter(owner_id=owner_id).values_list('pk', 'rank_prior').first()
+    if business is None:
+        return
+    pk, prior = business
+    if prior is None:
+        prior = stored_prior()
+    count, total, followers = ranking_inputs(owner_id)
+    score = get_strategy().score(count, total, followers, prior)
+    Business.objects.filter(pk=pk).update(rank_score=score, rank_prior=prior)
+
+
+def refresh_all_ranks(batch_size=1000):
+    """Recompute every business's rank_score in batches. Returns the count."""
+    from business.models import Business
+
+    inputs = get_ranking_inputs()
+    strategy = get_strategy()
+    prior = global_prior()
+    qs = Business.objects.only('pk', 'rank_score', 'rank_prior').annotate(
+        r_count=Coalesce(f'owner__{inputs.rating_relation}__count', 0),
+        r_total=Coalesce(f'owner__{inputs.rating_relation}__total', 0),
+        f_count=inputs.follower_count(),
+    ).order_by('pk')
+
+    updated, batch = 0, []
+    for business in qs.iterator(chunk_size=batch_size):
+        business.rank_score = strategy.score(business.r_count, business.r_total, business.f_count, prior)
+        business.rank_prior = prior
+        batch.append(business)
+        if len(batch) >= batch_size:
+            Business.objects.bulk_update(batch, ['rank_score', 'rank_prior'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        Business.objects.bulk_update(batch, ['rank_score', 'rank_prior'])
+        updated += len(batch)
+    return updated
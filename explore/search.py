@@ -0,0 +1,254 @@
+"""
+Full-text search index for Explore.
+
+Businesses and products are stored as documents in an inverted index so that
+search no longer runs icontains scans over the business/product tables. The
+default backend keeps the index in an SQLite FTS5 virtual table and ranks
+matches with BM25; another engine can be plugged in by pointing
+settings.EXPLORE_SEARCH_BACKEND at a BaseSearchBackend subclass. On other
+databases (where migration 0002 creates no index table) the default is
+ScanSearchBackend, which keeps nothing and falls back to icontains scans.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BACKEND = 'explore.search.SQLiteFTS5Backend'
+FALLBACK_BACKEND = 'explore.search.ScanSearchBackend'
+DEFAULT_MAX_RESULTS = 500
+
+# Document types and the small integer used to tag them inside the index.
+DOC_TYPES = {
+    'business': 1,
+    'product': 2,
+}
+
+
+# ---------- Documents ----------
+def business_document(business):
+    """(title, body, extra) text indexed for a Business."""
+    return (
+        business.name or '',
+        business.description or '',
+        business.owner.username if business.owner_id else '',
+    )
+
+
+def product_document(product):
+    """(title, body, extra) text indexed for a Product."""
+    return (
+        product.name or '',
+        product.description or '',
+        product.category.name if product.category_id else '',
+    )
+
+
+DOCUMENT_BUILDERS = {
+    'business': business_document,
+    'product': product_document,
+}
+
+# The same (title, body, extra) text as lookups, for ScanSearchBackend
+DOCUMENT_FIELDS = {
+    'business': ('name', 'description', 'owner__username'),
+    'product': ('name', 'description', 'category__name'),
+}
+
+
+def document_queryset(doc_type):
+    """Queryset yielding every instance of a document type, ready to index."""
+    from business.models import Business
+    from products.models import Product
+
+    if doc_type == 'business':
+        return Business.objects.select_related('owner')
+    if doc_type == 'product':
+        return Product.objects.select_related('category')
+    raise ValueError(f"Unknown search document type: {doc_type}")
+
+
+# ---------- Backends ----------
+class BaseSearchBackend:
+    """Interface every search index backend implements."""
+
+    def index(self, doc_type, instances):
+        """Add or replace the documents for the given instances."""
+        raise NotImplementedError
+
+    def remove(self, doc_type, ids):
+        """Drop the documents with the given primary keys."""
+        raise NotImplementedError
+
+    def search(self, doc_type, query, limit=None):
+        """Return matching primary keys, best match first."""
+        raise NotImplementedError
+
+    def filter(self, doc_type, query, queryset):
+        """
+        Restrict `queryset` to the documents matching `query`, annotated with
+        `search_rank` (lower is better) so callers can filter, count and page
+        in the database. Backends that can join their index into the query
+        should override this; the default goes through search() and is
+        capped at EXPLORE_SEARCH_MAX_RESULTS.
+        """
+        ids = self.search(doc_type, query)
+        if not ids:
+            return queryset.none()
+        rank = Case(
+            *[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).annotate(search_rank=rank)
+
+    def clear(self):
+        """Empty the whole index."""
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=500):
+        """Re-index every document from the database. Returns the count."""
+        self.clear()
+        total = 0
+        for doc_type in DOC_TYPES:
+            batch = []
+            for instance in document_queryset(doc_type).iterator(chunk_size=batch_size):
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    self.index(doc_type, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.index(doc_type, batch)
+                total += len(batch)
+        return total
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Inverted index stored in the `explore_search_index` FTS5 table.
+
+    The rowid encodes both the document type and the primary key, so
+    upserts and deletes are rowid lookups rather than scans of the index.
+    """
+
+    table = 'explore_search_index'
+    # BM25 column weights for (title, body, extra)
+    weights = (10.0, 1.0, 3.0)
+
+    def _rowid(self, doc_type, pk):
+        return pk * 4 + DOC_TYPES[doc_type]
+
+    def index(self, doc_type, instances):
+        build = DOCUMENT_BUILDERS[doc_type]
+        rows = [(self._rowid(doc_type, obj.pk), *build(obj)) for obj in instances]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {self.table}(rowid, title, body, extra) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, doc_type, ids):
+        rows = [(self._rowid(doc_type, pk),) for pk in ids]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", rows)
+
+    def search(self, doc_type, query, limit=None):
+        match = self.build_match(query)
+        if not match:
+            return []
+        if limit is None:
+            limit = getattr(settings, 'EXPLORE_SEARCH_MAX_RESULTS', DEFAULT_MAX_RESULTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid %% 4 = %s "
+                f"ORDER BY bm25({self.table}, %s, %s, %s) LIMIT %s",
+                [match, DOC_TYPES[doc_type], *self.weights, limit],
+            )
+            return [rowid // 4 for (rowid,) in cursor.fetchall()]
+
+    def filter(self, doc_type, query, queryset):
+        match = self.build_match(query)
+        if not match:
+            return queryset.none()
+        meta = queryset.model._meta
+        pk = f"{connection.ops.quote_name(meta.db_table)}.{connection.ops.quote_name(meta.pk.column)}"
+        # Joined on rowid, so matches are filtered, ranked and paged in the
+        # same query as the caller's filters, with no result cap
+        return queryset.extra(
+            select={'search_rank': f"bm25({self.table}, %s, %s, %s)"},
+            select_params=self.weights,
+            tables=[self.table],
+            where=[
+                f"{self.table} MATCH %s",
+                f"{self.table}.rowid %% 4 = %s",
+                f"{pk} = {self.table}.rowid / 4",
+            ],
+            params=[match, DOC_TYPES[doc_type]],
+        )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    @staticmethod
+    def build_match(query):
+        """
+        Turn free user input into a safe FTS5 expression: every word must
+        match, and the words are treated as prefixes so partial input works.
+        """
+        terms = re.findall(r'\w+', query or '')
+        return ' '.join(f'"{term}"*' for term in terms)
+
+
+class ScanSearchBackend(BaseSearchBackend):
+    """No index at all: matches are icontains scans over the document fields."""
+
+    def index(self, doc_type, instances):
+        pass
+
+    def remove(self, doc_type, ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, batch_size=500):
+        return 0
+
+    def search(self, doc_type, query, limit=None):
+        if limit is None:
+            limit = getattr(settings, 'EXPLORE_SEARCH_MAX_RESULTS', DEFAULT_MAX_RESULTS)
+        queryset = self.filter(doc_type, query, document_queryset(doc_type))
+        return list(queryset.order_by('-pk').values_list('pk', flat=True)[:limit])
+
+    def filter(self, doc_type, query, queryset):
+        query = (query or '').strip()
+        if not query:
+            return queryset.none()
+        match = Q()
+        for field in DOCUMENT_FIELDS[doc_type]:
+            match |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(match).annotate(search_rank=Value(0))
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured search backend (instantiated once per process)."""
+    global _backend
+    if _backend is None:
+        default = DEFAULT_BACKEND if connection.vendor == 'sqlite' else FALLBACK_BACKEND
+        path = getattr(settings, 'EXPLORE_SEARCH_BACKEND', default)
+        _backend = import_string(path)()
+    return _backend
@@ -1,35 +1,48 @@
 from rest_framework import serializers
 from accounts.models import User
+from accounts.serializers import FollowStatusMixin
 from business.models import Business
 from products.models import Product, ProductCategory
 from ratings.models import Rating
 from explore.models import FeaturedBusiness
+from mediafiles.serializers import ImageVariantsField
 
 class MiniUserSerializer(serializers.ModelSerializer):
+    profile_image_variants = ImageVariantsField(source='profile_image')
+
     class Meta:
         model = User
-        fields = ['id', 'username', 'profile_image']
+        fields = ['id', 'username', 'profile_image', 'profile_image_variants']
+
+class BusinessListSerializer(FollowStatusMixin, serializers.ModelSerializer):
+    """Expects a queryset built with Business.objects.with_stats()."""
+    follow_target = 'owner_id'
 
-class BusinessListSerializer(serializers.ModelSerializer):
-    owner = MiniUserSerializer(source='owner', read_only=True)
-    average_rating = serializers.FloatField(source='owner.average_rating', read_only=True)
-    followers_count = serializers.IntegerField(source='owner.followers_count', read_only=True)
-    is_verified = serializers.BooleanField(source='is_verified', read_only=True)
+    owner = MiniUserSerializer(read_only=True)
+    average_rating = serializers.FloatField(source='avg_rating', read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+    country = serializers.CharField(source='owner.country', read_only=True)
+    region = serializers.CharField(source='owner.region', read_only=True)
+    city = serializers.CharField(source='owner.city', read_only=True)
+    is_verified = serializers.BooleanField(read_only=True)
+    logo_variants = ImageVariantsField(source='logo')
 
     class Meta:
         model = Business
-        fields = ['id', 'name', 'slug', 'category', 'logo', 'description',
-                  'owner', 'average_rating', 'followers_count', 'country', 'region', 'city', 'is_verified']
+        fields = ['id', 'name', 'slug', 'category', 'logo', 'logo_variants', 'description',
+                  'owner', 'average_rating', 'followers_count', 'country', 'region', 'city', 'is_verified',
+                  'is_following']
 
 
 class ProductListSerializer(serializers.ModelSerializer):
     category_name = serializers.ReadOnlyField(source='category.name')
     business_name = serializers.ReadOnlyField(source='category.business.name')
     business_id = serializers.ReadOnlyField(source='category.business.id')
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'image', 'is_featured', 'stock',
+        fields = ['id', 'name', 'description', 'price', 'image', 'image_variants', 'is_featured', 'stock',
                   'created_at', 'category', 'category_name', 'business_name', 'business_id']
 
 
@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from business.models import Business
+from products.models import Product, ProductCategory
+from products.signals import products_bulk_saved
+from accounts.models import Follow
+from ratings.models import Rating
+from explore import search, ranking, trending
+from explore.autocomplete import index as autocomplete_index
+
+
+# ---------- Search index sync ----------
+@receiver(post_save, sender=Business)
+def index_business(sender, instance, **kwargs):
+    search.get_backend().index('business', [instance])
+
+
+@receiver(post_delete, sender=Business)
+def unindex_business(sender, instance, **kwargs):
+    search.get_backend().remove('business', [instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.get_backend().index('product', [instance])
+
+
+@receiver(products_bulk_saved, sender=Product)
+def index_bulk_products(sender, instances, **kwargs):
+    if instances:
+        search.get_backend().index('product', instances)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.get_backend().remove('product', [instance.pk])
+
+
+@receiver(post_save, sender=ProductCategory)
+def reindex_category_products(sender, instance, created, **kwargs):
+    # Product documents embed the category name
+    if not created:
+        search.get_backend().index('product', instance.products.select_related('category'))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_owned_business(sender, instance, created, update_fields=None, **kwargs):
+    # Business documents embed the owner's username; nothing else of the
+    # user is indexed, and a brand new user owns no business yet
+    if created:
+        return
+    if update_fields is not None:
+        if 'username' not in update_fields:
+            return
+    elif instance.username == getattr(instance, '_stored_username', None):
+        return
+    business = Business.objects.filter(owner=instance).select_related('owner').first()
+    if business:
+        search.get_backend().index('business', [business])
+
+
+# ---------- Autocomplete index sync ----------
+@receiver(post_save, sender=Business)
+def autocomplete_add_business(sender, instance, **kwargs):
+    autocomplete_index.update('businesses', instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Business)
+def autocomplete_remove_business(sender, instance, **kwargs):
+    autocomplete_index.remove('businesses', instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def autocomplete_add_product(sender, instance, **kwargs):
+    autocomplete_index.update('products', instance.pk, instance.name)
+
+
+@receiver(products_bulk_saved, sender=Product)
+def autocomplete_add_bulk_products(sender, instances, **kwargs):
+    for instance in instances:
+        autocomplete_index.update('products', instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Product)
+def autocomplete_remove_product(sender, instance, **kwargs):
+    autocomplete_index.remove('products', instance.pk)
+
+
+@receiver(post_save, sender=ProductCategory)
+def autocomplete_add_category(sender, instance, **kwargs):
+    autocomplete_index.update('categories', instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=ProductCategory)
+def autocomplete_remove_category(sender, instance, **kwargs):
+    autocomplete_index.remove('categories', instance.pk)
+
+
+# ---------- Ranking refresh ----------
+# Deferred to commit so the RatingAggregate / follower counters updated in
+# the same transaction are already in place.
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def rerank_rated_business(sender, instance, **kwargs):
+    # A moved rating also changes the business it was taken from
+    owner_ids = {instance.rated_user_id}
+    if instance.stored_state is not None:
+        owner_ids.add(instance.stored_state[0])
+    for owner_id in owner_ids:
+        transaction.on_commit(lambda owner_id=owner_id: ranking.refresh_business_rank(owner_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def rerank_followed_business(sender, instance, **kwargs):
+    owner_id = instance.following_id
+    transaction.on_commit(lambda: ranking.refresh_business_rank(owner_id))
+
+
+@receiver(post_save, sender=Business)
+def rank_new_business(sender, instance, created, **kwargs):
+    if created:
+        ranking.refresh_business_rank(instance.owner_id)
+
+
+# ---------- Trending ----------
+@receiver(post_save, sender=Product)
+def add_trending_product(sender, instance, created, **kwargs):
+    if created:
+        trending.add_product(instance.pk)
@@ -0,0 +1,163 @@
+"""
+Personalized business suggestions built from the accounts.Follow graph.
+
+Candidates come from two signals, both aggregated inside the database so a
+user's graph is never loaded into memory:
+  - friends-of-friends: businesses followed by the accounts the user follows
+  - co-follow: businesses followed by the users whose follows overlap most
+    with the user's own
+Each candidate's score is boosted when its business_category is one the user
+already follows a lot of, and when it is in the user's city or country.
+Results are written to SuggestedBusiness by `manage.py compute_suggestions`;
+anonymous users (and users without fresh rows) get a cached global list.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from accounts.models import User, Follow
+from explore.models import SuggestedBusiness
+
+BUSINESS_TYPES = ('business', 'premium')
+CANDIDATE_LIMIT = 500
+CO_FOLLOWER_LIMIT = 200
+FOF_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+CATEGORY_BOOST = 0.5
+CITY_BOOST = 0.3
+COUNTRY_BOOST = 0.15
+GLOBAL_CACHE_KEY = 'explore:suggested:global'
+GLOBAL_CACHE_TIMEOUT = 60 * 10
+# The cached global list is longer than a page so signed-in users still get
+# a full page after their own account and their follows are dropped
+GLOBAL_POOL_SIZE = 100
+
+
+def get_ttl():
+    return timedelta(hours=getattr(settings, 'SUGGESTIONS_TTL_HOURS', 24))
+
+
+# ---------- Scoring ----------
+def candidate_counts(user):
+    """{candidate_id: weighted graph score}, aggregated in SQL."""
+    followees = Follow.objects.filter(follower=user).values('following')
+    # Never suggest yourself or someone already followed; excluded before
+    # the LIMIT so heavy followers still get candidates
+    businesses = (
+        Follow.objects.filter(following__account_type__in=BUSINESS_TYPES)
+        .exclude(following__in=followees).exclude(following=user)
+    )
+
+    scores = {}
+    fof = (
+        businesses.filter(follower__in=followees)
+        .values('following').annotate(n=Count('pk')).order_by('-n')[:CANDIDATE_LIMIT]
+    )
+    for row in fof:
+        scores[row['following']] = FOF_WEIGHT * row['n']
+
+    co_followers = (
+        Follow.objects.filter(following__in=followees).exclude(follower=user)
+        .values('follower').annotate(overlap=Count('pk')).order_by('-overlap')
+        .values('follower')[:CO_FOLLOWER_LIMIT]
+    )
+    co = (
+        businesses.filter(follower__in=co_followers)
+        .values('following').annotate(n=Count('pk')).order_by('-n')[:CANDIDATE_LIMIT]
+    )
+    for row in co:
+        scores[row['following']] = scores.get(row['following'], 0.0) + CO_FOLLOW_WEIGHT * row['n']
+    return scores
+
+
+def score_user(user, limit=20):
+    """Top `limit` (candidate_id, score) pairs for one user."""
+    scores = candidate_counts(user)
+    if not scores:
+        return []
+
+    categories = set(
+        Follow.objects.filter(follower=user).exclude(following__business_category__isnull=True)
+        .values('following__business_category').annotate(n=Count('pk')).order_by('-n')
+        .values_list('following__business_category', flat=True)[:5]
+    )
+    details = User.objects.filter(pk__in=list(scores)).values_list('pk', 'business_category', 'city_ref', 'country_ref')
+    for pk, category, city, country in details:
+        boost = 1.0
+        if category and category in categories:
+            boost += CATEGORY_BOOST
+        if city and city == user.city_ref_id:
+            boost += CITY_BOOST
+        elif country and country == user.country_ref_id:
+            boost += COUNTRY_BOOST
+        scores[pk] *= boost
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+# ---------- Batch computation ----------
+def refresh_user(user, limit=20):
+    now = timezone.now()
+    rows = [
+        SuggestedBusiness(user=user, suggested_id=pk, score=score, computed_at=now)
+        for pk, score in score_user(user, limit)
+    ]
+    with transaction.atomic():
+        SuggestedBusiness.objects.filter(user=user).delete()
+        SuggestedBusiness.objects.bulk_create(rows)
+    return len(rows)
+
+
+def refresh_all(batch_size=500, stale_only=False, limit=20):
+    """Recompute suggestions for every user who follows someone."""
+    users = User.objects.filter(pk__in=Follow.objects.values('follower')).only('pk', 'city_ref', 'country_ref')
+    if stale_only:
+        fresh = SuggestedBusiness.objects.filter(computed_at__gte=timezone.now() - get_ttl()).values('user')
+        users = users.exclude(pk__in=fresh)
+
+    processed = 0
+    for user in users.order_by('pk').iterator(chunk_size=batch_size):
+        refresh_user(user, limit)
+        processed += 1
+    return processed
+
+
+# ---------- Reading ----------
+def global_suggestions(limit=10, user=None):
+    """
+    Most-followed business accounts, cached for everyone. For a signed-in
+    `user`, their own account and the accounts they follow are left out.
+    """
+    ids = cache.get(GLOBAL_CACHE_KEY)
+    if ids is None:
+        ids = list(
+            User.objects.filter(account_type__in=BUSINESS_TYPES)
+            .order_by('-followers_count', '-date_joined')
+            .values_list('pk', flat=True)[:max(limit, GLOBAL_POOL_SIZE)]
+        )
+        cache.set(GLOBAL_CACHE_KEY, ids, GLOBAL_CACHE_TIMEOUT)
+    if user is None or not user.is_authenticated:
+        return ids[:limit]
+
+    already = set(
+        Follow.objects.filter(follower=user, following__in=ids).values_list('following', flat=True)
+    )
+    already.add(user.pk)
+    return [pk for pk in ids if pk not in already][:limit]
+
+
+def suggestions_for(user, limit=10):
+    """Fresh personalized suggestion ids for `user`, else the global list."""
+    if user.is_authenticated:
+        ids = list(
+            SuggestedBusiness.objects.filter(user=user, computed_at__gte=timezone.now() - get_ttl())
+            .order_by('-score').values_list('suggested_id', flat=True)[:limit]
+        )
+        if ids:
+            return ids
+    return global_suggestions(limit, user)
@@ -1,3 +1,335 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.models import User
+from core.pagination import KeysetPagination
+from business.models import Business
+from explore import facets, ranking, search, suggestions, trending
+from explore.views import TrendingProductsView
+from explore.autocomplete import AutocompleteIndex, PrefixIndex
+from explore.models import TrendingProductCache
+from products.models import Product, ProductCategory
+from ratings.models import Rating
+
+
+class ExploreSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owners = User.objects.bulk_create([
+            User(username=f'owner{i}', email=f'owner{i}@example.com') for i in range(8)
+        ])
+        Business.objects.bulk_create([
+            Business(owner=owner, name=f'Shoe shop {i}', slug=f'shoe-shop-{i}',
+                     category='food' if i % 2 else 'fashion')
+            for i, owner in enumerate(owners)
+        ])
+        search.get_backend().rebuild()
+
+    @override_settings(EXPLORE_SEARCH_MAX_RESULTS=3)
+    def test_filters_and_count_are_not_capped_by_search_limit(self):
+        response = APIClient().get('/api/explore/search/', {'q': 'shoe', 'type': 'business', 'category': 'food'})
+        businesses = response.json()['businesses']
+        self.assertEqual(businesses['count'], 4)
+        self.assertTrue(all(item['category'] == 'food' for item in businesses['results']))
+
+
+    def test_scan_backend_matches_without_an_index(self):
+        backend = search.ScanSearchBackend()
+        backend.index('business', Business.objects.all())
+        businesses = backend.filter('business', 'shop', Business.objects.filter(category='food'))
+        self.assertEqual(businesses.count(), 4)
+        self.assertEqual(backend.filter('business', 'owner3', Business.objects.all()).get().owner.username, 'owner3')
+        self.assertFalse(backend.filter('business', '  ', Business.objects.all()).exists())
+
+    def test_owner_save_reindexes_only_on_username_change(self):
+        owner = User.objects.get(username='owner1')
+        owner.bio = 'Hello'
+        with CaptureQueriesContext(connection) as queries:
+            owner.save()
+        self.assertFalse(any('business_business' in query['sql'] for query in queries))
+
+        owner.username = 'cobbler'
+        owner.save()
+        self.assertEqual(search.get_backend().search('business', 'cobbler'), [owner.business.pk])
+
+
+class PrefixIndexTests(TestCase):
+    rows = [(1, 'Red Shoe Store'), (2, 'Blue shoes'), (3, 'Shoe repair'), (4, 'Bags')]
+
+    def test_build_matches_incremental_adds(self):
+        incremental = PrefixIndex()
+        for pk, label in self.rows:
+            incremental.add(pk, label)
+        built = PrefixIndex.build(self.rows)
+        self.assertEqual(built._entries, incremental._entries)
+        self.assertEqual([item['id'] for item in built.search('shoe', 5)], [3, 1, 2])
+
+    def test_add_after_build_replaces_label(self):
+        index = PrefixIndex.build(self.rows)
+        index.add(4, 'Leather goods')
+        self.assertEqual(index.search('bag', 5), [])
+        self.assertEqual(index.search('leath', 5), [{'id': 4, 'name': 'Leather goods'}])
+
+
+class AutocompleteIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com')
+
+    def setUp(self):
+        cache.clear()
+
+    def add_business_elsewhere(self, name):
+        # bulk_create skips the signals, like a write made by another process
+        return Business.objects.bulk_create([Business(owner=self.owner, name=name, slug='b', category='food')])[0]
+
+    def test_rebuilds_after_ttl(self):
+        index = AutocompleteIndex()
+        self.assertEqual(index.lookup('cob')['businesses'], [])
+        business = self.add_business_elsewhere('Cobbler')
+        self.assertEqual(index.lookup('cob')['businesses'], [])
+        index._loaded_at -= 301
+        self.assertEqual(index.lookup('cob')['businesses'], [{'id': business.pk, 'name': 'Cobbler'}])
+
+    @override_settings(EXPLORE_AUTOCOMPLETE={'TTL': 300, 'SHARED_CACHE': 'default'})
+    def test_changes_reach_other_processes_through_the_version_stamp(self):
+        writer, reader = AutocompleteIndex(), AutocompleteIndex()
+        writer.lookup('cob')
+        self.assertEqual(reader.lookup('cob')['businesses'], [])
+
+        business = self.add_business_elsewhere('Cobbler')
+        loaded_at = writer._loaded_at
+        writer.update('businesses', business.pk, business.name)
+        self.assertEqual(reader.lookup('cob')['businesses'], [{'id': business.pk, 'name': 'Cobbler'}])
+        # The writer applied its own change in place instead of rebuilding
+        self.assertEqual(writer.lookup('cob')['businesses'], [{'id': business.pk, 'name': 'Cobbler'}])
+        self.assertEqual(writer._loaded_at, loaded_at)
+
+        business.delete()
+        writer.remove('businesses', business.pk)
+        self.assertEqual(reader.lookup('cob')['businesses'], [])
+
+
+class TrendingProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', email='seller@example.com')
+        category = ProductCategory.objects.create(business=seller, name='Shoes')
+        cls.old, cls.hot, cls.new = Product.objects.bulk_create([
+            Product(category=category, name=name, price=1) for name in ('old', 'hot', 'new')
+        ])
+        trending.refresh_trending()
+        TrendingProductCache.objects.filter(product=cls.hot, window_days=7).update(score=5.0)
+
+    def test_unscored_products_follow_scored_ones(self):
+        response = APIClient().get('/api/explore/trending-products/', {'days': 7})
+        names = [item['name'] for item in response.json()['results']]
+        self.assertEqual(names, ['hot', 'new', 'old'])
+
+    def test_new_products_are_listed_before_the_next_refresh(self):
+        newest = Product.objects.create(category=self.hot.category, name='newest', price=1)
+        response = APIClient().get('/api/explore/trending-products/', {'days': 7})
+        names = [item['name'] for item in response.json()['results']]
+        self.assertEqual(names, ['hot', 'newest', 'new', 'old'])
+
+    def test_pages_through_the_score_index(self):
+        view = TrendingProductsView()
+        view.request = Request(APIRequestFactory().get('/api/explore/trending-products/'))
+        queryset = view.get_queryset()
+
+        # Same ordering and LIMIT as a KeysetPagination page
+        paginator = KeysetPagination()
+        paginator.fields = paginator.get_ordering(queryset)
+        paginator.nullable = paginator.get_nullable(queryset)
+        page = queryset.order_by(*paginator.order_by(False))[:paginator.page_size + 1]
+
+        sql, params = page.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('trending_window_score_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TopRatedBusinessesQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owners = [
+            User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com')
+            for i in range(15)
+        ]
+        for i, owner in enumerate(cls.owners):
+            Business.objects.create(owner=owner, name=f'Business {i}', slug=f'business-{i}', category='food')
+        fan = User.objects.create_user(username='fan', email='fan@example.com')
+        for i, owner in enumerate(cls.owners[:5]):
+            fan.follow(owner)
+            Rating.objects.create(rater=fan, rated_user=owner, stars=i % 5 + 1)
+
+    def test_each_page_is_one_query(self):
+        client = APIClient()
+        with self.assertNumQueries(1):
+            first = client.get('/api/explore/top-businesses/').json()
+        with self.assertNumQueries(1):
+            second = client.get(first['next']).json()
+        self.assertEqual(len(first['results']) + len(second['results']), 15)
+
+    def test_follow_status_adds_one_query_for_signed_in_users(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(username='fan'))
+        with self.assertNumQueries(2):
+            client.get('/api/explore/top-businesses/')
+
+
+class GlobalSuggestionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.businesses = User.objects.bulk_create([
+            User(username=f'shop{i}', email=f'shop{i}@example.com', account_type='business', followers_count=10 - i)
+            for i in range(4)
+        ])
+        cls.viewer = cls.businesses[1]
+        cls.viewer.follow(cls.businesses[0])
+
+    def setUp(self):
+        cache.delete(suggestions.GLOBAL_CACHE_KEY)
+
+    def test_signed_in_users_skip_themselves_and_their_follows(self):
+        ids = suggestions.suggestions_for(self.viewer, limit=3)
+        self.assertEqual(ids, [self.businesses[2].pk, self.businesses[3].pk])
+
+    def test_anonymous_users_get_the_plain_list(self):
+        ids = suggestions.suggestions_for(AnonymousUser(), limit=2)
+        self.assertEqual(ids, [self.businesses[0].pk, self.businesses[1].pk])
+
+
+class CandidateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='me', email='me@example.com', account_type='business')
+        cls.shops = User.objects.bulk_create([
+            User(username=f'shop{i}', email=f'shop{i}@example.com', account_type='business') for i in range(5)
+        ])
+        friends = User.objects.bulk_create([
+            User(username=f'friend{i}', email=f'friend{i}@example.com') for i in range(3)
+        ])
+        for friend in friends:
+            cls.user.follow(friend)
+            friend.follow(cls.user)
+            for shop in cls.shops[:4]:
+                friend.follow(shop)
+        friends[0].follow(cls.shops[4])
+        for shop in cls.shops[:4]:
+            cls.user.follow(shop)
+
+    @patch.object(suggestions, 'CANDIDATE_LIMIT', 3)
+    def test_follows_are_excluded_before_the_limit(self):
+        self.assertEqual(list(suggestions.candidate_counts(self.user)), [self.shops[4].pk])
+
+
+class RankingStrategyTests(TestCase):
+    def test_bayesian_average_needs_volume_to_beat_the_prior(self):
+        strategy = ranking.BayesianAverage(confidence=10)
+        self.assertEqual(strategy.score(0, 0, 0, 3.5), 3.5)
+        self.assertLess(strategy.score(1, 5, 0, 3.5), strategy.score(300, 1440, 0, 3.5))
+
+    def test_wilson_lower_bound(self):
+        strategy = ranking.WilsonLowerBound()
+        self.assertEqual(strategy.score(0, 0, 0, 3.0), 0.0)
+        self.assertLess(strategy.score(1, 5, 0, 3.0), strategy.score(100, 500, 0, 3.0))
+        self.assertLess(strategy.score(100, 100, 0, 3.0), 0.05)
+
+    def test_follower_blend_stays_in_unit_range_and_rewards_reach(self):
+        strategy = ranking.FollowerWeightedBlend()
+        low = strategy.score(10, 40, 0, 3.0)
+        high = strategy.score(10, 40, 10000, 3.0)
+        self.assertTrue(0 <= low < high <= 1)
+
+
+class RankingRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owners = [
+            User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com') for i in range(3)
+        ]
+        for i, owner in enumerate(cls.owners):
+            Business.objects.create(owner=owner, name=f'Business {i}', slug=f'business-{i}', category='food')
+        cls.fans = [User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com') for i in range(3)]
+
+    def scores(self):
+        return dict(Business.objects.values_list('owner_id', 'rank_score'))
+
+    def test_incremental_refresh_uses_the_stored_prior(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(rater=self.fans[0], rated_user=self.owners[0], stars=5)
+        ranking.refresh_all_ranks()
+        prior = Business.objects.values_list('rank_prior', flat=True).distinct().get()
+        self.assertEqual(prior, 5.0)
+
+        # Shifts the site-wide mean, but the bulk refresh hasn't run since
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(rater=self.fans[1], rated_user=self.owners[1], stars=1)
+        expected = ranking.get_strategy().score(1, 1, 0, prior)
+        self.assertAlmostEqual(self.scores()[self.owners[1].pk], expected)
+
+    def test_moving_a_rating_reranks_both_businesses(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rating = Rating.objects.create(rater=self.fans[0], rated_user=self.owners[0], stars=5)
+        ranking.refresh_all_ranks()
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.rated_user = self.owners[1]
+            rating.save()
+        incremental = self.scores()
+        ranking.refresh_all_ranks()
+        self.assertEqual(incremental, self.scores())
+
+    def test_following_a_user_without_a_business_only_checks_for_one(self):
+        with self.assertNumQueries(1):
+            ranking.refresh_business_rank(self.fans[0].pk)
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        places = [('Kenya', 'Nairobi', 'food'), ('Kenya', 'Mombasa', 'food'), ('Kenya', 'Nairobi', 'fashion'),
+                  ('Uganda', 'Kampala', 'food')]
+        for i, (country, city, category) in enumerate(places):
+            owner = User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com',
+                                             country=country, city=city)
+            Business.objects.create(owner=owner, name=f'Shop {i}', slug=f'shop-{i}', category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self, filters):
+        result = facets.facet_counts(Business.objects.all(), facets.BUSINESS_DIMENSIONS, filters)
+        return {name: {row['value']: row['count'] for row in rows} for name, rows in result.items()}
+
+    def test_each_dimension_ignores_only_its_own_filter(self):
+        counts = self.counts({'country': ' kenya', 'category': 'food'})
+        # Other countries stay visible, narrowed by the category filter
+        self.assertEqual(counts['country'], {'Kenya': 2, 'Uganda': 1})
+        self.assertEqual(counts['category'], {'food': 2, 'fashion': 1})
+        self.assertEqual(counts['city'], {'Nairobi': 1, 'Mombasa': 1})
+        self.assertEqual(counts['region'], {})
+
+    def test_cache_key_uses_the_values_as_filtered(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {}
+
+        facets.cached_facets('business', '', {'country': 'Kenya'}, compute)
+        facets.cached_facets('business', '', {'country': ' kenya '}, compute)
+        self.assertEqual(len(calls), 1)
+        # icontains on the raw value: 'food ' and 'food' match different rows
+        facets.cached_facets('business', '', {'category': 'food '}, compute)
+        facets.cached_facets('business', '', {'category': 'food'}, compute)
+        self.assertEqual(len(calls), 3)
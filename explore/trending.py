@@ -0,0 +1,117 @@
+"""
+Trending products pipeline.
+
+Scores are computed offline for a few fixed look-back windows and upserted
+into TrendingProductCache, so TrendingProductsView only reads an indexed
+column. Views are read from the hourly/daily counters in products.rollups;
+each contributes a weight that halves every TRENDING_HALF_LIFE_HOURS, and
+featured products get a flat boost. Every product gets a row in every
+window, 0 when it has no views, so the view can page the rows through the
+(window_days, -score, -id) index; new products get their 0 rows from
+explore.signals as they are created.
+
+Nothing refreshes the scores on its own: schedule `manage.py refresh_trending`
+(e.g. from cron every 10 minutes) or run it with --interval as a long-lived
+worker process.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from explore.models import TrendingProductCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = (1, 7, 30)
+DEFAULT_HALF_LIFE_HOURS = 48
+FEATURED_BOOST = 10.0
+
+
+def get_windows():
+    return tuple(sorted(getattr(settings, 'TRENDING_WINDOWS', DEFAULT_WINDOWS)))
+
+
+def pick_window(days):
+    """Smallest precomputed window covering `days`, else the largest one."""
+    windows = get_windows()
+    for window in windows:
+        if window >= days:
+            return window
+    return windows[-1]
+
+
+def compute_scores(window_days, now=None):
+    """Return {product_id: score} for one window, covering every product."""
+    from products.models import Product
+    from products.rollups import HOUR, rollups_since, pick_granularity
+
+    now = now or timezone.now()
+    since = now - timedelta(days=window_days)
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', DEFAULT_HALF_LIFE_HOURS) * 3600.0
+
+    # Each bucket's views are weighted as if they happened mid-bucket
+    granularity = pick_granularity(since)
+    midpoint = timedelta(minutes=30) if granularity == HOUR else timedelta(hours=12)
+    scores = dict.fromkeys(Product.objects.order_by('pk').values_list('pk', flat=True), 0.0)
+    buckets = rollups_since(since, granularity).values_list('product_id', 'bucket_start', 'count')
+    for product_id, start, count in buckets.iterator(chunk_size=5000):
+        age = max((now - (start + midpoint)).total_seconds(), 0.0)
+        scores[product_id] = scores.get(product_id, 0.0) + count * 0.5 ** (age / half_life)
+
+    for product_id in Product.objects.filter(is_featured=True).values_list('pk', flat=True):
+        scores[product_id] = scores.get(product_id, 0.0) + FEATURED_BOOST
+    return scores
+
+
+def refresh_window(window_days, now=None, batch_size=1000):
+    """Upsert the scores of one window and drop rows that fell out of it."""
+    started = timezone.now()
+    scores = compute_scores(window_days, now=now)
+    rows = [
+        TrendingProductCache(product_id=product_id, window_days=window_days, score=score)
+        for product_id, score in scores.items()
+    ]
+    with transaction.atomic():
+        TrendingProductCache.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product', 'window_days'],
+            update_fields=['score', 'last_calculated'],
+        )
+        TrendingProductCache.objects.filter(
+            window_days=window_days, last_calculated__lt=started
+        ).delete()
+    return len(rows)
+
+
+def add_product(product_id):
+    """Give a new product its 0 rows so it is listed before the next refresh."""
+    TrendingProductCache.objects.bulk_create(
+        [TrendingProductCache(product_id=product_id, window_days=window) for window in get_windows()],
+        ignore_conflicts=True,
+    )
+
+
+def refresh_trending(windows=None):
+    """Refresh every configured window. Returns {window_days: rows written}."""
+    return {window: refresh_window(window) for window in (windows or get_windows())}
+
+
+def run_periodically(interval, stop_event=None, windows=None):
+    """Refresh every `interval` seconds until stop_event is set."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        started = time.monotonic()
+        try:
+            refresh_trending(windows)
+        except Exception:
+            logger.exception("Trending refresh failed")
+        stop_event.wait(max(interval - (time.monotonic() - started), 0))
+
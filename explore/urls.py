@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('categories/', views.CategoryListView.as_view(), name='explore-categories'),
     path('search/', views.ExploreSearchView.as_view(), name='explore-search'),
+    path('autocomplete/', views.AutocompleteView.as_view(), name='explore-autocomplete'),
     path('suggested/', views.SuggestedBusinessView.as_view(), name='explore-suggested'),
     path('trending-products/', views.TrendingProductsView.as_view(), name='explore-trending'),
     path('top-businesses/', views.TopRatedBusinessesView.as_view(), name='explore-top-businesses'),
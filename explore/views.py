@@ -1,8 +1,9 @@
-from django.db.models import Q, Count, Avg, F, Case, When, Value, IntegerField
+from django.db.models import F
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 
@@ -10,13 +11,19 @@ from accounts.models import User
 from accounts.serializers import UserSerializer
 from business.models import Business
 from products.models import Product, ProductCategory
-from ratings.models import Rating
+from explore.models import TrendingProductCache
 from explore.serializers import (
     BusinessListSerializer,
     ProductListSerializer,
     ProductCategorySerializer,
 )
-from explore.models import TrendingProductCache, FeaturedBusiness
+from explore import search, trending, ranking, suggestions, facets
+from core.pagination import KeysetPagination
+from products import rollups
+from explore.autocomplete import index as autocomplete_index
+
+# sort=views ranks products by their views over this many days
+VIEWS_SORT_DAYS = 30
 
 
 # ---------- Pagination ----------
@@ -26,6 +33,12 @@ class StandardPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class BusinessSearchPagination(StandardPagination):
+    """Pages the business half of ExploreSearchView separately from products."""
+    page_query_param = 'business_page'
+    page_size_query_param = 'business_page_size'
+
+
 # ---------- Categories ----------
 class CategoryListView(generics.ListAPIView):
     queryset = ProductCategory.objects.all().order_by('name')
@@ -38,124 +51,148 @@ class CategoryListView(generics.ListAPIView):
 class ExploreSearchView(APIView):
     """
     Unified search endpoint:
-    params: q, type=(business|product|both), category, country, region, city, sort
+    params: q, type=(business|product|both), category, country, region, city, sort,
+            facets=1 (adds per-filter value counts for the current query)
+    Businesses are paged with business_page/business_page_size, products with
+    page/page_size; each half comes back as its own paginated block.
     """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         q = request.query_params.get('q', '').strip()
         search_type = request.query_params.get('type', 'both')
-        category = request.query_params.get('category')
-        country = request.query_params.get('country')
-        region = request.query_params.get('region')
-        city = request.query_params.get('city')
+        filters = {
+            name: request.query_params[name]
+            for name in ('category', 'country', 'region', 'city')
+            if request.query_params.get(name)
+        }
         sort = request.query_params.get('sort')  # 'followers', 'rating', 'recent', 'views', 'price_asc', 'price_desc'
+        with_facets = request.query_params.get('facets') in ('1', 'true')
 
-        results = {'businesses': [], 'products': []}
+        results = {}
+        if with_facets:
+            results['facets'] = {}
 
         # ----- Business search -----
         if search_type in ('business', 'both'):
-            bs_q = Business.objects.all()
+            base = Business.objects.all()
+            if q:
+                base = search.get_backend().filter('business', q, base)
 
+            bs_q = facets.apply_filters(base.with_stats(), facets.BUSINESS_DIMENSIONS, filters)
             if q:
-                bs_q = bs_q.filter(
-                    Q(name__icontains=q)
-                    | Q(description__icontains=q)
-                    | Q(owner__username__icontains=q)
-                )
-            if category:
-                bs_q = bs_q.filter(category__icontains=category)
-            if country:
-                bs_q = bs_q.filter(country__icontains=country)
-            if region:
-                bs_q = bs_q.filter(region__icontains=region)
-            if city:
-                bs_q = bs_q.filter(city__icontains=city)
+                bs_q = bs_q.order_by('search_rank', '-id')
 
             # Sorting
             if sort == 'followers':
-                bs_q = bs_q.annotate(fcount=Count('owner__followers')).order_by('-fcount')
+                bs_q = bs_q.order_by('-followers_count', '-id')
             elif sort == 'rating':
-                bs_q = bs_q.annotate(avg=Avg('owner__received_ratings__stars')).order_by('-avg')
-            elif sort == 'recent':
-                bs_q = bs_q.order_by('-created_at')
+                bs_q = bs_q.order_by(F('avg_rating').desc(nulls_last=True), '-id')
+            elif sort == 'recent' or not bs_q.ordered:
+                bs_q = bs_q.order_by('-created_at', '-id')
 
-            serializer = BusinessListSerializer(bs_q, many=True, context={'request': request})
-            results['businesses'] = serializer.data
+            results['businesses'] = self.paginate(
+                bs_q, BusinessListSerializer, BusinessSearchPagination(), request
+            )
+            if with_facets:
+                results['facets']['businesses'] = facets.cached_facets(
+                    'business', q, filters,
+                    lambda: facets.facet_counts(base, facets.BUSINESS_DIMENSIONS, filters),
+                )
 
         # ----- Product search -----
         if search_type in ('product', 'both'):
-            p_q = Product.objects.select_related('category', 'category__business').all()
+            base = Product.objects.all()
+            if q:
+                base = search.get_backend().filter('product', q, base)
 
+            p_q = facets.apply_filters(
+                base.select_related('category', 'category__business'), facets.PRODUCT_DIMENSIONS, filters
+            )
             if q:
-                p_q = p_q.filter(
-                    Q(name__icontains=q)
-                    | Q(description__icontains=q)
-                    | Q(category__name__icontains=q)
-                )
-            if category:
-                p_q = p_q.filter(category__name__icontains=category)
-            if country:
-                p_q = p_q.filter(category__business__country__icontains=country)
-            if region:
-                p_q = p_q.filter(category__business__region__icontains=region)
-            if city:
-                p_q = p_q.filter(category__business__city__icontains=city)
+                p_q = p_q.order_by('search_rank', '-id')
 
             # Sorting
             if sort == 'views':
-                p_q = p_q.annotate(vcount=Count('views')).order_by('-vcount')
-            elif sort == 'recent':
-                p_q = p_q.order_by('-created_at')
+                since = timezone.now() - timedelta(days=VIEWS_SORT_DAYS)
+                p_q = p_q.annotate(
+                    vcount=Coalesce(rollups.views_since_subquery(since), 0)
+                ).order_by('-vcount', '-id')
             elif sort == 'price_asc':
-                p_q = p_q.order_by('price')
+                p_q = p_q.order_by('price', 'id')
             elif sort == 'price_desc':
-                p_q = p_q.order_by('-price')
+                p_q = p_q.order_by('-price', '-id')
+            elif sort == 'recent' or not p_q.ordered:
+                p_q = p_q.order_by('-created_at', '-id')
 
-            paginator = StandardPagination()
-            page = paginator.paginate_queryset(p_q, request)
-            serializer = ProductListSerializer(page, many=True, context={'request': request})
-            return paginator.get_paginated_response({
-                'businesses': results['businesses'],
-                'products': serializer.data,
-            })
+            results['products'] = self.paginate(
+                p_q, ProductListSerializer, StandardPagination(), request
+            )
+            if with_facets:
+                results['facets']['products'] = facets.cached_facets(
+                    'product', q, filters,
+                    lambda: facets.facet_counts(base, facets.PRODUCT_DIMENSIONS, filters),
+                )
 
         return Response(results)
 
+    def paginate(self, queryset, serializer_class, paginator, request):
+        """Each half of the results is paginated independently."""
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializer_class(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data).data
 
-# ---------- Suggested businesses ----------
-class SuggestedBusinessView(generics.ListAPIView):
-    serializer_class = UserSerializer
+
+# ---------- Autocomplete ----------
+class AutocompleteView(APIView):
+    """
+    Typeahead suggestions served from the in-memory prefix index.
+    params: q, limit (default 5, max 20)
+    """
     permission_classes = [permissions.AllowAny]
 
-    def get_queryset(self):
-        qs = User.objects.filter(account_type='business')
+    def get(self, request):
+        q = request.query_params.get('q', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+        except (TypeError, ValueError):
+            limit = 5
 
-        # Safely check if the User model has a followers relationship
-        if hasattr(User, 'followers') or 'followers' in [f.name for f in User._meta.get_fields()]:
-            # If followers relation exists, count them
-            qs = qs.annotate(followers_total=Count('followers')).order_by('-followers_total')[:10]
-        else:
-            # If no followers field, just return latest businesses
-            qs = qs.order_by('-date_joined')[:10]
+        if not q:
+            return Response({'businesses': [], 'products': [], 'categories': []})
+        return Response(autocomplete_index.lookup(q, limit))
 
-        return qs
 
+# ---------- Suggested businesses ----------
+class SuggestedBusinessView(generics.ListAPIView):
+    """
+    Personalized business suggestions precomputed by explore.suggestions
+    (`manage.py compute_suggestions`); anonymous users and users without
+    fresh suggestions get the cached global top list.
+    """
+    serializer_class = UserSerializer
+    permission_classes = [permissions.AllowAny]
 
-            
+    def get_queryset(self):
+        ids = suggestions.suggestions_for(self.request.user)
+        users = User.objects.in_bulk(ids)
+        return [users[pk] for pk in ids if pk in users]
 
 
 # ---------- Trending products ----------
 class TrendingProductsView(generics.ListAPIView):
     """
-    Trending products are scored using:
-      - number of views in the recent period (days query param, default 7)
-      - a small boost for products marked is_featured
-    Returns paginated product list ordered by score then recency.
+    Trending products read from the precomputed TrendingProductCache:
+      - `days` (default 7) picks the closest precomputed window
+      - scores are time-decayed view counts plus a boost for featured products
+      - every product has a row (0 without views), and ties go to the newest
+        row, so unviewed products follow the scored ones roughly newest first
+    Pages the cache rows through trending_window_score_idx and returns a
+    cursor-paginated product list.
     """
     serializer_class = ProductListSerializer
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         # number of days to consider for "recent" — default 7
@@ -163,66 +200,35 @@ class TrendingProductsView(generics.ListAPIView):
             since_days = int(self.request.query_params.get('days', 7))
         except (TypeError, ValueError):
             since_days = 7
-        since = timezone.now() - timedelta(days=since_days)
-
-        qs = Product.objects.select_related('category', 'category__business').all()
-        # count recent views, boost featured products
-        qs = qs.annotate(
-            views_recent=Count('views', filter=Q(views__viewed_at__gte=since))
-        ).annotate(
-            score=F('views_recent') + Case(
-                When(is_featured=True, then=Value(10)),
-                default=Value(0),
-                output_field=IntegerField(),
-            )
-        ).order_by('-score', '-created_at')
+        window = trending.pick_window(since_days)
 
-        return qs
+        return (
+            TrendingProductCache.objects.filter(window_days=window)
+            .select_related('product__category__business')
+            .order_by('-score', '-pk')
+        )
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer([row.product for row in page], many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 # ---------- Top Rated Businesses ----------
 class TopRatedBusinessesView(generics.ListAPIView):
     """
-    List businesses ordered by average rating then follower count (if available).
-    Uses Business model and BusinessListSerializer. Paginated.
+    List businesses ordered by their precomputed rank_score (explore.ranking).
+    Uses Business model and BusinessListSerializer. Cursor-paginated.
     """
     serializer_class = BusinessListSerializer
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        # Annotate businesses with avg rating (from ratings on the owner) and follower count if relation exists.
-        qs = Business.objects.all().select_related('owner')
-
-        # annotate average rating (ratings attached to the owner)
-        qs = qs.annotate(avg_rating=Avg('owner__received_ratings__stars'))
-
-        # try to annotate follower count from a related name; safe fallback if relation/mapping differs
-        # common related names used earlier: 'followers', 'followers_set', 'followers_user', 'followers_set'
-        follower_rel_candidates = [
-            'owner__followers',        # e.g. Follow model FK->user: related_name='followers'
-            'owner__followers_set',    # django default when related_name omitted
-            'owner__followers_user',   # other possible names used earlier in your models
-            'owner__followers_set'     # duplicate safe entry
-        ]
-
-        # We'll try to annotate using a valid relation name. If none exist, fallback to 0.
-        annotated = False
-        for rel in follower_rel_candidates:
-            try:
-                qs_test = qs.annotate(fcount=Count(rel))
-                # executing a cheap queryset slice will reveal if DB accepts the annotation
-                qs_test[:1]
-                qs = qs.annotate(followers_count=Count(rel))
-                annotated = True
-                break
-            except Exception:
-                continue
-
-        if not annotated:
-            # no follower relation found — set followers_count to 0 for ordering via a Value
-            qs = qs.annotate(followers_count=Value(0, output_field=IntegerField()))
-
-        # order by avg_rating desc then followers_count desc then recently created
-        qs = qs.order_by('-avg_rating', '-followers_count', '-created_at')
+        # one query: owner joined, rating/follower inputs from the ranking registry
+        inputs = ranking.get_ranking_inputs()
+        qs = Business.objects.select_related('owner').annotate(**inputs.annotations())
+
+        # order by the precomputed rank (see explore.ranking) then recency
+        qs = qs.order_by('-rank_score', '-created_at')
         return qs
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MediafilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mediafiles'
+
+    def ready(self):
+        import mediafiles.signals  # noqa: F401
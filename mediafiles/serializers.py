@@ -1,13 +1,27 @@
 from rest_framework import serializers
 from .models import MediaFile
+from . import variants
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only {variant: url} map for an image field (see mediafiles.variants)."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return variants.variant_urls(value, self.context.get('request'))
+
 
 class MediaFileSerializer(serializers.ModelSerializer):
     uploader_name = serializers.CharField(source='uploader.username', read_only=True)
     file_url = serializers.SerializerMethodField()
+    file_variants = ImageVariantsField(source='file')
 
     class Meta:
         model = MediaFile
-        fields = ['id', 'uploader', 'uploader_name', 'file', 'file_url', 'media_type', 'caption', 'created_at']
+        fields = ['id', 'uploader', 'uploader_name', 'file', 'file_url', 'file_variants', 'media_type', 'caption', 'created_at']
         read_only_fields = ['uploader', 'created_at']
 
     def get_file_url(self, obj):
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from business.models import Business
+from products.models import Product
+from . import variants
+from .models import MediaFile
+
+# ✅ Image fields that get resized WebP variants, by model
+IMAGE_FIELDS = {
+    Product: 'image',
+    Business: 'logo',
+    settings.AUTH_USER_MODEL: 'profile_image',
+    MediaFile: 'file',
+}
+
+
+def queue_variants(sender, instance, update_fields=None, **kwargs):
+    field = IMAGE_FIELDS.get(sender) or IMAGE_FIELDS.get(sender._meta.label)
+    if update_fields is not None and field not in update_fields:
+        return
+    name = getattr(instance, field).name
+    if variants.is_image(name):
+        # The file is already in storage; wait for the row so a rollback
+        # doesn't leave us rendering an orphan
+        transaction.on_commit(lambda: variants.schedule(name))
+
+
+for model in IMAGE_FIELDS:
+    post_save.connect(queue_variants, sender=model, dispatch_uid=f'image_variants_{model}')
@@ -1,3 +1,98 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from mediafiles import variants
+from mediafiles.models import MediaFile
+from mediafiles.serializers import MediaFileSerializer
+
+
+def png(width=640, height=480):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(output, 'PNG')
+    return output.getvalue()
+
+
+class VariantTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        variants._known.clear()
+        self.addCleanup(variants._known.clear)
+        self.name = default_storage.save('product_images/shoe.png', ContentFile(png()))
+
+
+class GenerateTests(VariantTestCase):
+    def test_writes_every_missing_variant_once(self):
+        written = variants.generate(self.name)
+        self.assertEqual(sorted(written), [
+            'product_images/shoe.medium.webp', 'product_images/shoe.small.webp', 'product_images/shoe.thumb.webp',
+        ])
+        with default_storage.open('product_images/shoe.thumb.webp') as handle, Image.open(handle) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (160, 120)))
+        self.assertEqual(variants.generate(self.name), [])
+
+    def test_check_fresh_only_replaces_outdated_variants(self):
+        variants.generate(self.name, ['thumb', 'small'])
+        os.utime(default_storage.path('product_images/shoe.thumb.webp'), (0, 0))
+        written = variants.generate(self.name, ['thumb', 'small'], check_fresh=True)
+        self.assertEqual(written, ['product_images/shoe.thumb.webp'])
+
+    def test_keeps_a_variant_another_worker_wrote_meanwhile(self):
+        target = 'product_images/shoe.thumb.webp'
+        render = variants.render
+
+        def racing_render(*args):
+            default_storage.save(target, ContentFile(b'theirs'))
+            return render(*args)
+
+        with patch.object(variants, 'render', side_effect=racing_render):
+            self.assertEqual(variants.generate(self.name, ['thumb']), [])
+        with default_storage.open(target) as handle:
+            self.assertEqual(handle.read(), b'theirs')
+
+    def test_unreadable_image_writes_nothing(self):
+        name = default_storage.save('product_images/broken.png', ContentFile(b'not an image'))
+        with self.assertLogs('mediafiles.variants', 'WARNING'):
+            self.assertEqual(variants.generate(name), [])
+        self.assertFalse(default_storage.exists('product_images/broken.thumb.webp'))
+
+
+class VariantViewTests(VariantTestCase):
+    def test_renders_on_first_request_and_redirects(self):
+        response = self.client.get(f'/api/mediafiles/variants/small/{self.name}')
+        self.assertRedirects(response, '/media/product_images/shoe.small.webp', fetch_redirect_response=False)
+        self.assertTrue(default_storage.exists('product_images/shoe.small.webp'))
+
+    def test_not_found(self):
+        default_storage.save('product_images/broken.png', ContentFile(b'not an image'))
+        for path in ('huge/' + self.name, 'thumb/product_images/missing.png',
+                     'thumb/product_images/../product_images/shoe.png', 'thumb/product_images/broken.png'):
+            with self.subTest(path=path), self.assertNoLogs('django.request', 'ERROR'):
+                self.assertEqual(self.client.get(f'/api/mediafiles/variants/{path}').status_code, 404)
+
+
+class VariantUrlTests(VariantTestCase):
+    def test_serializer_points_at_view_until_the_variant_exists(self):
+        media = MediaFile(file=self.name, media_type='image')
+        urls = MediaFileSerializer(media).data['file_variants']
+        self.assertEqual(urls['thumb'], f'/api/mediafiles/variants/thumb/{self.name}')
+
+        variants.generate(self.name, ['thumb'])
+        urls = MediaFileSerializer(media).data['file_variants']
+        self.assertEqual(urls['thumb'], '/media/product_images/shoe.thumb.webp')
+        self.assertEqual(set(urls), {'thumb', 'small', 'medium'})
+
+    def test_non_images_have_no_variants(self):
+        media = MediaFile(file='uploads/media/clip.mp4', media_type='video')
+        self.assertIsNone(MediaFileSerializer(media).data['file_variants'])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import MediaFileListCreateView
+from .views import MediaFileListCreateView, VariantView
 
 urlpatterns = [
     path('', MediaFileListCreateView.as_view(), name='mediafile-list-create'),
+    path('variants/<str:variant>/<path:name>', VariantView.as_view(), name='image-variant'),
 ]
@@ -0,0 +1,194 @@
+"""
+Resized WebP variants of uploaded images.
+
+Each variant is the original scaled down to fit a SIZES box and re-encoded
+as WebP, stored next to the original: product_images/shoe.jpg gets
+product_images/shoe.thumb.webp, product_images/shoe.medium.webp, ...
+
+After an image field is saved, mediafiles.signals queues the original on a
+small thread pool that writes every missing (or outdated) variant. Until a
+variant exists, variant_urls() points at VariantView, which renders it on
+the first request and redirects to the stored file. Settings (all
+optional), e.g.:
+    IMAGE_VARIANTS = {'SIZES': {'thumb': 160, 'small': 480, 'medium': 960}, 'QUALITY': 80, 'WORKERS': 2}
+"""
+
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.urls import reverse
+
+from core.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+# URLs of variants already known to be in storage, so serializers don't have
+# to ask the storage backend for every image on every page
+_known = LRUCache(maxsize=50000)
+
+
+def get_variant_settings():
+    return {
+        'SIZES': {'thumb': 160, 'small': 480, 'medium': 960}, 'QUALITY': 80, 'WORKERS': 2,
+        **getattr(settings, 'IMAGE_VARIANTS', {}),
+    }
+
+
+def variant_name(name, variant):
+    stem, _ = posixpath.splitext(name)
+    return f'{stem}.{variant}.webp'
+
+
+def is_variant(name):
+    stem, ext = posixpath.splitext(name)
+    return ext == '.webp' and posixpath.splitext(stem)[1][1:] in get_variant_settings()['SIZES']
+
+
+def is_image(name):
+    return bool(name) and posixpath.splitext(name)[1].lower() in IMAGE_EXTENSIONS and not is_variant(name)
+
+
+# ---------- Rendering ----------
+def render(source, size, quality):
+    """WebP bytes of the image in `source` scaled to fit a size x size box."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        output = io.BytesIO()
+        image.save(output, 'WEBP', quality=quality, method=4)
+    return output.getvalue()
+
+
+def is_stale(name, target, storage):
+    if not storage.exists(target):
+        return True
+    try:
+        return storage.get_modified_time(target) < storage.get_modified_time(name)
+    except NotImplementedError:
+        return False
+
+
+def generate(name, variants=None, storage=default_storage, check_fresh=False):
+    """
+    Write the requested variants (default: all) of the image stored as `name`.
+    Existing variants are kept unless check_fresh is set and the original is
+    newer. Returns the names of the variants written; files that can't be
+    decoded as images are logged and get none.
+    """
+    from PIL import Image
+
+    conf = get_variant_settings()
+    sizes = conf['SIZES']
+    targets = {
+        variant: variant_name(name, variant)
+        for variant in (variants or sizes)
+        if variant in sizes
+    }
+    if check_fresh:
+        targets = {variant: target for variant, target in targets.items() if is_stale(name, target, storage)}
+    else:
+        targets = {variant: target for variant, target in targets.items() if not storage.exists(target)}
+    if not targets:
+        return []
+
+    with storage.open(name, 'rb') as handle:
+        original = handle.read()
+    written = []
+    for variant, target in targets.items():
+        try:
+            data = render(io.BytesIO(original), sizes[variant], conf['QUALITY'])
+        except (OSError, Image.DecompressionBombError) as exc:
+            # UnidentifiedImageError is an OSError too
+            logger.warning("Not generating variants of %s: %s", name, exc)
+            break
+        # Another worker may have written it while we rendered; only an
+        # outdated copy is replaced
+        if storage.exists(target):
+            if not (check_fresh and is_stale(name, target, storage)):
+                _known.set(target, storage.url(target))
+                continue
+            storage.delete(target)
+        saved = storage.save(target, ContentFile(data))
+        if saved != target:
+            # Another worker wrote it first; keep theirs
+            storage.delete(saved)
+        _known.set(target, storage.url(target))
+        written.append(target)
+    return written
+
+
+# ---------- Background pool ----------
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def get_executor():
+    """The process-wide pool generating variants after upload."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_variant_settings()['WORKERS'], thread_name_prefix='image-variants',
+                )
+    return _executor
+
+
+def _run(name):
+    try:
+        generate(name, check_fresh=True)
+    except Exception:
+        logger.exception("Could not generate image variants for %s", name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        connection.close()
+
+
+def schedule(name):
+    """Queue every variant of `name` for background generation."""
+    if not is_image(name):
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    get_executor().submit(_run, name)
+
+
+# ---------- URLs ----------
+def variant_url(name, variant, storage=default_storage):
+    """Stored variant URL, or the lazy VariantView URL while it is missing."""
+    target = variant_name(name, variant)
+    url = _known.get(target)
+    if url is None and storage.exists(target):
+        url = storage.url(target)
+        _known.set(target, url)
+    if url is not None:
+        return url
+    return reverse('image-variant', kwargs={'variant': variant, 'name': name})
+
+
+def variant_urls(field_file, request=None):
+    """{variant: url} for an image FieldFile, or None if it holds no image."""
+    if not field_file or not is_image(field_file.name):
+        return None
+    urls = {}
+    for variant in get_variant_settings()['SIZES']:
+        url = variant_url(field_file.name, variant, field_file.storage)
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
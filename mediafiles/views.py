@@ -1,6 +1,10 @@
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponseRedirect
 from rest_framework import generics, permissions
+from rest_framework.views import APIView
 from .models import MediaFile
 from mediafiles.serializers import MediaFileSerializer
+from . import variants
 
 class MediaFileListCreateView(generics.ListCreateAPIView):
     queryset = MediaFile.objects.all().order_by('-created_at')
@@ -9,3 +13,19 @@ class MediaFileListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(uploader=self.request.user)
+
+
+# ✅ IMAGE VARIANT (rendered on first request, then served from storage)
+class VariantView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, variant, name):
+        if (variant not in variants.get_variant_settings()['SIZES'] or not variants.is_image(name)
+                or name.startswith('/') or '..' in name.split('/') or not default_storage.exists(name)):
+            raise Http404
+        variants.generate(name, [variant])
+        target = variants.variant_name(name, variant)
+        # Nothing written means the original isn't a readable image
+        if not default_storage.exists(target):
+            raise Http404
+        return HttpResponseRedirect(default_storage.url(target))
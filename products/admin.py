@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import ProductCategory, Product, ProductView
+from .models import ProductCategory, Product, ProductView, ProductViewRollup, ProductViewSketch
 
 admin.site.register(ProductCategory)
 admin.site.register(Product)
 admin.site.register(ProductView)
+admin.site.register(ProductViewRollup)
+admin.site.register(ProductViewSketch)
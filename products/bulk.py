@@ -0,0 +1,267 @@
+"""
+Bulk catalog import/export for a seller's products.
+
+Imports are read line by line from the upload (CSV with a header row, or
+NDJSON with one object per line) and handled in chunks: every row is checked
+against the seller's categories, fetched once up front, and each chunk is
+written with bulk_create/bulk_update inside its own transaction. Rows with an
+`id` update that product (if it belongs to the seller); other rows create
+one; when several rows of a chunk update the same product, the last one
+wins. Invalid rows are skipped and reported with their line number. If the
+upload stops decoding partway (bad UTF-8 or broken CSV), the rows before it
+are still imported and the report names the line where reading stopped.
+
+Exports stream the same columns without loading the catalog into memory.
+Settings (all optional), e.g.:
+    PRODUCT_BULK = {'CHUNK_SIZE': 500, 'MAX_CHUNK_SIZE': 5000, 'EXPORT_CHUNK_SIZE': 2000}
+"""
+
+import codecs
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Product, ProductCategory
+from .signals import products_bulk_saved
+
+COLUMNS = ['id', 'category', 'category_name', 'name', 'description', 'price', 'is_featured', 'stock']
+WRITABLE_FIELDS = ['category', 'name', 'description', 'price', 'is_featured', 'stock']
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f', ''}
+
+
+def get_bulk_settings():
+    return {
+        'CHUNK_SIZE': 500, 'MAX_CHUNK_SIZE': 5000, 'EXPORT_CHUNK_SIZE': 2000,
+        **getattr(settings, 'PRODUCT_BULK', {}),
+    }
+
+
+# ---------- Reading ----------
+def read_csv(lines):
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig'))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        yield number, row if isinstance(row, dict) else None
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+# ---------- Validation ----------
+class CategoryMap:
+    """The seller's categories, looked up by id or case-insensitive name."""
+
+    def __init__(self, user):
+        categories = list(ProductCategory.objects.filter(business=user))
+        self.by_id = {category.pk: category for category in categories}
+        self.by_name = {category.name.strip().casefold(): category for category in categories}
+
+    def resolve(self, row):
+        value = row.get('category')
+        if value not in (None, ''):
+            try:
+                return self.by_id.get(int(value))
+            except (TypeError, ValueError):
+                return None
+        name = row.get('category_name')
+        if isinstance(name, str) and name.strip():
+            return self.by_name.get(name.strip().casefold())
+        return None
+
+
+def clean_row(row, categories):
+    """(values, errors) for one input row; values only when errors is empty."""
+    errors = {}
+    values = {}
+
+    category = categories.resolve(row)
+    if category is None:
+        errors['category'] = 'Unknown category (give one of your category ids or names).'
+    values['category'] = category
+
+    name = str(row.get('name') or '').strip()
+    if not name:
+        errors['name'] = 'This field is required.'
+    elif len(name) > 255:
+        errors['name'] = 'Ensure this field has no more than 255 characters.'
+    values['name'] = name
+
+    values['description'] = str(row.get('description') or '') or None
+
+    try:
+        price = Decimal(str(row.get('price', '')).strip())
+        if not price.is_finite() or price < 0 or price.as_tuple().exponent < -2 or price >= 10 ** 8:
+            raise InvalidOperation
+        values['price'] = price
+    except InvalidOperation:
+        errors['price'] = 'A non-negative number with at most 8 digits and 2 decimal places is required.'
+
+    try:
+        stock = int(str(row.get('stock') or 0).strip())
+        if stock < 0:
+            raise ValueError
+        values['stock'] = stock
+    except ValueError:
+        errors['stock'] = 'A non-negative integer is required.'
+
+    featured = str(row.get('is_featured', '')).strip().casefold()
+    if featured in TRUE_VALUES:
+        values['is_featured'] = True
+    elif featured in FALSE_VALUES:
+        values['is_featured'] = False
+    else:
+        errors['is_featured'] = 'Must be true or false.'
+
+    product_id = row.get('id')
+    if product_id not in (None, ''):
+        try:
+            values['id'] = int(product_id)
+        except (TypeError, ValueError):
+            errors['id'] = 'Must be an integer.'
+
+    return (None, errors) if errors else (values, {})
+
+
+# ---------- Import ----------
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def write_chunk(user, chunk, report):
+    """Write one chunk of validated (line, values) pairs in a single transaction."""
+    ids = [values['id'] for _, values in chunk if 'id' in values]
+    existing = Product.objects.filter(pk__in=ids, category__business=user).in_bulk() if ids else {}
+
+    to_create, to_update = [], {}
+    now = timezone.now()
+    for line, values in chunk:
+        product_id = values.pop('id', None)
+        if product_id is None:
+            to_create.append(Product(**values))
+            continue
+        product = existing.get(product_id)
+        if product is None:
+            report.error(line, {'id': 'No such product in your catalog.'})
+            continue
+        for field, value in values.items():
+            setattr(product, field, value)
+        product.updated_at = now
+        to_update[product.pk] = product
+
+    to_update = list(to_update.values())
+    with transaction.atomic():
+        created = Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, WRITABLE_FIELDS + ['updated_at'])
+    report.created += len(created)
+    report.updated += len(to_update)
+    # bulk writes skip post_save; let the search/autocomplete indexes catch up
+    products_bulk_saved.send(sender=Product, instances=created + to_update)
+
+
+def import_rows(user, rows, chunk_size):
+    """Import (line, row) pairs for `user`. Returns an ImportReport."""
+    categories = CategoryMap(user)
+    report = ImportReport()
+    chunk = []
+    line = 0
+    try:
+        for line, row in rows:
+            if row is None:
+                report.error(line, {'row': 'Not a JSON object.'})
+                continue
+            values, errors = clean_row(row, categories)
+            if errors:
+                report.error(line, errors)
+                continue
+            chunk.append((line, values))
+            if len(chunk) >= chunk_size:
+                write_chunk(user, chunk, report)
+                chunk = []
+    except (UnicodeDecodeError, csv.Error):
+        report.error(line + 1, {'row': 'Not valid UTF-8 CSV; the rest of the upload was not read.'})
+    if chunk:
+        write_chunk(user, chunk, report)
+    return report
+
+
+# ---------- Export ----------
+def export_queryset(user):
+    return (
+        Product.objects.filter(category__business=user)
+        .order_by('pk')
+        .values_list('id', 'category_id', 'category__name', 'name', 'description',
+                     'price', 'is_featured', 'stock')
+    )
+
+
+def export_csv(user, chunk_size):
+    """Yield the catalog as CSV text, one line at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(COLUMNS)
+    yield flush()
+    for row in export_queryset(user).iterator(chunk_size=chunk_size):
+        writer.writerow(row)
+        yield flush()
+
+
+def export_ndjson(user, chunk_size):
+    """Yield the catalog as NDJSON, one product per line."""
+    for row in export_queryset(user).iterator(chunk_size=chunk_size):
+        item = dict(zip(COLUMNS, row))
+        item['price'] = str(item['price'])
+        yield json.dumps(item) + '\n'
+
+
+EXPORTERS = {
+    'csv': (export_csv, 'text/csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
@@ -0,0 +1,152 @@
+"""
+Approximate unique-viewer counts with HyperLogLog.
+
+Every product keeps one sketch per UTC day in ProductViewSketch: 2**PRECISION
+one-byte registers (1 KiB) holding the longest run of leading zero bits seen
+among the hashed viewer ids that fall in each register. Sketches for any set
+of days merge by taking the register-wise maximum, so "unique viewers over
+the last N days" reads N small blobs and never touches ProductView; the
+merge runs on whole blobs as big integers rather than byte by byte. With
+PRECISION = 10 the standard error is about 1.04 / sqrt(1024), i.e. 3.3%.
+
+Sketches are updated by products.ingest in the same transaction as the raw
+views and the rollups.
+"""
+
+import hashlib
+from math import log
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+PRECISION = 10
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64
+VALUE_BITS = HASH_BITS - PRECISION
+
+ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+# 2 ** -rank for every possible register value
+POWERS = [2.0 ** -rank for rank in range(VALUE_BITS + 2)]
+
+# Registers never exceed VALUE_BITS + 1 < 128, so the top bit of every byte
+# is free for the SWAR comparison in merge_blobs()
+HIGH_BITS = int.from_bytes(b'\x80' * REGISTERS, 'big')
+
+
+def hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """A HyperLogLog sketch over REGISTERS one-byte registers."""
+
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(REGISTERS)
+
+    def add(self, value):
+        x = hash64(value)
+        index = x >> VALUE_BITS
+        rest = x & ((1 << VALUE_BITS) - 1)
+        rank = VALUE_BITS - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        self.registers = bytearray(merge_blobs([bytes(self.registers), bytes(other.registers)]))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def count(self):
+        return estimate(self.registers)
+
+    @classmethod
+    def merged(cls, blobs):
+        """One sketch holding the union of serialized sketches."""
+        blobs = [blob for blob in blobs if blob]
+        if not blobs:
+            return cls()
+        return cls(merge_blobs(blobs))
+
+
+def merge_blobs(blobs):
+    """
+    Register-wise maximum of serialized sketches, computed on the whole
+    blob as one big integer: per byte, (a | 0x80) - b keeps its top bit
+    exactly when a >= b, which becomes a 0x00/0xFF selection mask.
+    """
+    merged = int.from_bytes(blobs[0], 'big')
+    for blob in blobs[1:]:
+        other = int.from_bytes(blob, 'big')
+        keep = ((((merged | HIGH_BITS) - other) & HIGH_BITS) >> 7) * 0xFF
+        merged = (merged & keep) | (other & ~keep)
+    return merged.to_bytes(REGISTERS, 'big')
+
+
+def estimate(registers):
+    registers = bytes(registers)
+    harmonic = sum(POWERS[rank] * registers.count(rank) for rank in set(registers))
+    raw = ALPHA * REGISTERS * REGISTERS / harmonic
+    if raw <= 2.5 * REGISTERS:
+        zeros = registers.count(0)
+        if zeros:
+            # Small range: linear counting is more accurate
+            return round(REGISTERS * log(REGISTERS / zeros))
+    return round(raw)
+
+
+# ---------- Storage ----------
+def day_of(at):
+    return at.astimezone(dt_timezone.utc).date()
+
+
+def add_events(events):
+    """Fold (product_id, viewer_id, at) events into the per-day sketches."""
+    from products.models import ProductViewSketch
+
+    viewers = {}
+    for product_id, viewer_id, at in events:
+        viewers.setdefault((product_id, day_of(at)), set()).add(viewer_id)
+    if not viewers:
+        return
+
+    with transaction.atomic():
+        # Create the missing rows first so the read below can lock every one
+        ProductViewSketch.objects.bulk_create(
+            [ProductViewSketch(product_id=product_id, day=day) for product_id, day in viewers],
+            ignore_conflicts=True,
+        )
+        days = {day for _, day in viewers}
+        products = {product_id for product_id, _ in viewers}
+        rows = (
+            ProductViewSketch.objects.select_for_update()
+            .filter(product_id__in=products, day__in=days)
+        )
+        changed = []
+        for row in rows:
+            ids = viewers.get((row.product_id, row.day))
+            if not ids:
+                continue
+            sketch = HyperLogLog(row.registers)
+            sketch.update(ids)
+            row.registers = sketch.to_bytes()
+            changed.append(row)
+        ProductViewSketch.objects.bulk_update(changed, ['registers'], batch_size=500)
+
+
+def unique_viewers(product_id, days, now=None):
+    """Approximate distinct viewers of a product over the last `days` days."""
+    from products.models import ProductViewSketch
+
+    today = day_of(now or timezone.now())
+    blobs = ProductViewSketch.objects.filter(
+        product_id=product_id, day__gt=today - timedelta(days=days)
+    ).values_list('registers', flat=True)
+    return HyperLogLog.merged([bytes(blob) for blob in blobs]).count()
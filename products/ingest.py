@@ -0,0 +1,193 @@
+"""
+Buffered product-view ingestion.
+
+ProductViewRecordView only appends (product_id, viewer_id, timestamp) to an
+in-process ring buffer and returns. A daemon thread flushes the buffer every
+FLUSH_INTERVAL seconds, or as soon as FLUSH_SIZE events are waiting; the
+remaining events are drained at interpreter exit. A flush collapses repeated
+views per (product, viewer), drops ids that no longer exist and upserts the
+rest into ProductView in one INSERT ... ON CONFLICT per batch, bumping
+view_count and last_viewed_at. The same batch is added to the hourly and
+daily counters in products.rollups and the unique-viewer sketches in
+products.hll.
+
+When the buffer is full the oldest events are overwritten, so a database
+outage costs views rather than memory. Settings (all optional), e.g.:
+    PRODUCT_VIEW_BUFFER = {'MAX_EVENTS': 50000, 'FLUSH_SIZE': 1000, 'FLUSH_INTERVAL': 5}
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import hll, rollups
+
+logger = logging.getLogger(__name__)
+
+
+def get_buffer_settings():
+    return {
+        'MAX_EVENTS': 50000, 'FLUSH_SIZE': 1000, 'FLUSH_INTERVAL': 5,
+        **getattr(settings, 'PRODUCT_VIEW_BUFFER', {}),
+    }
+
+
+# ---------- Writing ----------
+def collapse(events):
+    """{(product_id, viewer_id): (count, first_at, last_at)} for a list of events."""
+    views = {}
+    for product_id, viewer_id, at in events:
+        key = (product_id, viewer_id)
+        count, first, last = views.get(key, (0, at, at))
+        views[key] = (count + 1, min(first, at), max(last, at))
+    return views
+
+
+def existing_ids(model, ids):
+    return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def upsert_views(views, batch_size=500):
+    """Insert new (product, viewer) rows and add to the counters of existing ones."""
+    from products.models import ProductView
+
+    table = connection.ops.quote_name(ProductView._meta.db_table)
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = [
+        (product_id, viewer_id, adapt(first), adapt(last), count)
+        for (product_id, viewer_id), (count, first, last) in views.items()
+    ]
+    sql = (
+        f"INSERT INTO {table} (product_id, viewer_id, viewed_at, last_viewed_at, view_count) "
+        "VALUES (%s, %s, %s, %s, %s) "
+        "ON CONFLICT (product_id, viewer_id) DO UPDATE SET "
+        f"view_count = {table}.view_count + excluded.view_count, "
+        "last_viewed_at = CASE WHEN excluded.last_viewed_at > "
+        f"{table}.last_viewed_at THEN excluded.last_viewed_at ELSE {table}.last_viewed_at END"
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+
+
+def last_seen(pairs, batch_size=400):
+    """{(product_id, viewer_id): last_viewed_at} for the pairs that already have a row."""
+    from products.models import ProductView
+
+    pairs = list(pairs)
+    seen = {}
+    for start in range(0, len(pairs), batch_size):
+        match = Q()
+        for product_id, viewer_id in pairs[start:start + batch_size]:
+            match |= Q(product_id=product_id, viewer_id=viewer_id)
+        rows = ProductView.objects.filter(match).values_list('product_id', 'viewer_id', 'last_viewed_at')
+        for product_id, viewer_id, at in rows:
+            seen[(product_id, viewer_id)] = at
+    return seen
+
+
+def apply_events(events):
+    """Persist a batch of buffered view events. Returns the number of views kept."""
+    from products.models import Product
+
+    products = existing_ids(Product, {product_id for product_id, _, _ in events})
+    viewers = existing_ids(get_user_model(), {viewer_id for _, viewer_id, _ in events})
+    events = [event for event in events if event[0] in products and event[1] in viewers]
+    if events:
+        views = collapse(events)
+        with transaction.atomic():
+            # Read before the upsert moves last_viewed_at forward
+            previous = last_seen(views)
+            upsert_views(views)
+            rollups.add_counts(rollups.bucket_counts(events, previous))
+            hll.add_events(events)
+    return len(events)
+
+
+# ---------- Buffer ----------
+class ViewBuffer:
+    """Bounded ring buffer of view events with a background flusher."""
+
+    def __init__(self, max_events, flush_size, flush_interval):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(self, product_id, viewer_id, at=None):
+        self._events.append((product_id, viewer_id, at or timezone.now()))
+        if self._thread is None:
+            self.start()
+        if len(self._events) >= self.flush_size:
+            self._wake.set()
+
+    def drain(self):
+        # popleft() is atomic, so events appended while draining are either
+        # taken now or left for the next flush, never dropped
+        events = []
+        pop = self._events.popleft
+        try:
+            for _ in range(len(self._events)):
+                events.append(pop())
+        except IndexError:
+            pass
+        return events
+
+    def flush(self):
+        """Write out everything buffered so far. Returns the number of views written."""
+        with self._flush_lock:
+            events = self.drain()
+            if not events:
+                return 0
+            try:
+                return apply_events(events)
+            except Exception:
+                logger.exception("Dropped %d product view events", len(events))
+                return 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='product-view-flusher', daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """The process-wide ViewBuffer."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                conf = get_buffer_settings()
+                _buffer = ViewBuffer(conf['MAX_EVENTS'], conf['FLUSH_SIZE'], conf['FLUSH_INTERVAL'])
+    return _buffer
+
+
+def record_view(product_id, viewer_id):
+    get_buffer().record(product_id, viewer_id)
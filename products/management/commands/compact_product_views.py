@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import rollups
+
+
+class Command(BaseCommand):
+    help = "Apply the product view retention policy (old hourly rollups and raw views)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and compact every N seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            hourly, raw = rollups.compact(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {hourly} hourly rollups and {raw} raw product views."
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
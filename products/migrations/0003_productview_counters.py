@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:45
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_last_viewed(apps, schema_editor):
+    ProductView = apps.get_model('products', 'ProductView')
+    ProductView.objects.update(last_viewed_at=F('viewed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_product_recent_idx_product_product_price_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productview',
+            name='last_viewed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='productview',
+            name='view_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_last_viewed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# ✅ Frozen copy of the bucketing at the time of this migration, so later
+# changes to products.rollups don't change what it does
+def bucket_start(at, granularity):
+    at = at.astimezone(dt_timezone.utc)
+    if granularity == 'day':
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    Seed rollups from existing ProductView rows. Raw rows only keep the last
+    view time, so each viewer is counted once, in that bucket.
+    """
+    ProductView = apps.get_model('products', 'ProductView')
+    ProductViewRollup = apps.get_model('products', 'ProductViewRollup')
+    connection = schema_editor.connection
+
+    counts = {}
+    rows = ProductView.objects.values_list('product_id', 'last_viewed_at')
+    for product_id, at in rows.iterator(chunk_size=5000):
+        for granularity in ('hour', 'day'):
+            key = (product_id, granularity, bucket_start(at, granularity))
+            counts[key] = counts.get(key, 0) + 1
+
+    table = connection.ops.quote_name(ProductViewRollup._meta.db_table)
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = [(product_id, granularity, adapt(start), count) for (product_id, granularity, start), count in counts.items()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), 500):
+            cursor.executemany(
+                f"INSERT INTO {table} (product_id, granularity, bucket_start, count) VALUES (%s, %s, %s, %s)",
+                rows[start:start + 500],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_productview_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_rollups', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='product_view_rollup_time_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'granularity', 'bucket_start'), name='product_view_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
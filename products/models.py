@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -28,17 +29,69 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='product_recent_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.category.business}"
 
 
 class ProductView(models.Model):
+    """One row per (product, viewer); written in batches by products.ingest."""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='views')
     viewer = models.ForeignKey(User, on_delete=models.CASCADE)
     viewed_at = models.DateTimeField(auto_now_add=True)
+    last_viewed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    view_count = models.PositiveIntegerField(default=1)
 
     class Meta:
         unique_together = ('product', 'viewer')
 
     def __str__(self):
         return f"{self.viewer} viewed {self.product}"
+
+
+class ProductViewRollup(models.Model):
+    """Views of a product per hour or per day, maintained by products.rollups."""
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITIES = [
+        (HOUR, 'Hourly'),
+        (DAY, 'Daily'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='view_rollups')
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'granularity', 'bucket_start'], name='product_view_rollup_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start'], name='product_view_rollup_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.granularity} {self.bucket_start:%Y-%m-%d %H:00}: {self.count}"
+
+
+class ProductViewSketch(models.Model):
+    """HyperLogLog registers of a product's viewers on one UTC day (products.hll)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='view_sketches')
+    day = models.DateField()
+    registers = models.BinaryField(default=bytes)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='product_view_sketch_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.day}"
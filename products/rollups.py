@@ -0,0 +1,143 @@
+"""
+Hourly and daily product view counters.
+
+Every batch flushed by products.ingest is also added to ProductViewRollup
+rows keyed by (product, granularity, bucket_start), with buckets aligned to
+UTC hours and days. A viewer counts at most once per product and bucket:
+repeats inside a batch are collapsed, and buckets the viewer was already
+counted in (per ProductView.last_viewed_at) are skipped, so refreshing or
+scripting the view endpoint can't inflate trending. Readers (trending, the
+views sort in explore and the seller stats endpoint) sum a handful of
+counter rows instead of counting raw ProductView rows. `manage.py compact_product_views` applies the retention
+policy: hourly rollups are kept for HOURLY_RETENTION_DAYS, raw ProductView
+rows not seen for RAW_RETENTION_DAYS are deleted, daily rollups are kept.
+
+Settings (all optional), e.g.:
+    PRODUCT_VIEW_ROLLUPS = {'HOURLY_RETENTION_DAYS': 14, 'RAW_RETENTION_DAYS': 90}
+"""
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+HOUR = 'hour'
+DAY = 'day'
+
+
+def get_rollup_settings():
+    return {
+        'HOURLY_RETENTION_DAYS': 14, 'RAW_RETENTION_DAYS': 90,
+        **getattr(settings, 'PRODUCT_VIEW_ROLLUPS', {}),
+    }
+
+
+def bucket_start(at, granularity):
+    at = at.astimezone(dt_timezone.utc)
+    if granularity == DAY:
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+# ---------- Writing ----------
+def bucket_counts(events, last_seen=None):
+    """
+    {(product_id, granularity, bucket_start): viewers} for (product, viewer, at)
+    events. `last_seen` maps (product_id, viewer_id) to the view time already
+    stored before this batch; buckets starting at or before it were counted.
+    """
+    last_seen = last_seen or {}
+    counted = set()
+    counts = {}
+    for product_id, viewer_id, at in events:
+        previous = last_seen.get((product_id, viewer_id))
+        for granularity in (HOUR, DAY):
+            start = bucket_start(at, granularity)
+            if previous is not None and previous >= start:
+                continue
+            marker = (product_id, viewer_id, granularity, start)
+            if marker in counted:
+                continue
+            counted.add(marker)
+            key = (product_id, granularity, start)
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def add_counts(counts, batch_size=500):
+    """Add to the counters, creating the bucket rows as needed."""
+    from products.models import ProductViewRollup
+
+    table = connection.ops.quote_name(ProductViewRollup._meta.db_table)
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = [
+        (product_id, granularity, adapt(start), count)
+        for (product_id, granularity, start), count in counts.items()
+    ]
+    sql = (
+        f"INSERT INTO {table} (product_id, granularity, bucket_start, count) "
+        "VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (product_id, granularity, bucket_start) DO UPDATE SET "
+        f"count = {table}.count + excluded.count"
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+
+
+# ---------- Reading ----------
+def pick_granularity(since):
+    """Hourly buckets while they are still retained for the whole range, else daily."""
+    hourly_days = get_rollup_settings()['HOURLY_RETENTION_DAYS']
+    return HOUR if since >= timezone.now() - timedelta(days=hourly_days) else DAY
+
+
+def rollups_since(since, granularity=None):
+    from products.models import ProductViewRollup
+
+    granularity = granularity or pick_granularity(since)
+    return ProductViewRollup.objects.filter(
+        granularity=granularity, bucket_start__gte=bucket_start(since, granularity)
+    )
+
+
+def views_since_subquery(since, product_ref='pk'):
+    """Correlated SUM of a product's views since `since`, for annotations."""
+    totals = (
+        rollups_since(since, DAY).filter(product=OuterRef(product_ref))
+        .order_by().values('product').annotate(total=Sum('count')).values('total')
+    )
+    return Subquery(totals)
+
+
+def series(product_id, since, granularity=DAY):
+    """[(bucket_start, views), ...] for one product, oldest first."""
+    return list(
+        rollups_since(since, granularity).filter(product_id=product_id)
+        .order_by('bucket_start').values_list('bucket_start', 'count')
+    )
+
+
+# ---------- Retention ----------
+def compact(now=None, batch_size=5000):
+    """Apply the retention policy. Returns (hourly rollups, raw views) deleted."""
+    from products.models import ProductView, ProductViewRollup
+
+    now = now or timezone.now()
+    conf = get_rollup_settings()
+    hourly = ProductViewRollup.objects.filter(
+        granularity=HOUR, bucket_start__lt=now - timedelta(days=conf['HOURLY_RETENTION_DAYS'])
+    )
+    raw = ProductView.objects.filter(last_viewed_at__lt=now - timedelta(days=conf['RAW_RETENTION_DAYS']))
+    return delete_in_batches(hourly, batch_size), delete_in_batches(raw, batch_size)
+
+
+def delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
@@ -28,5 +28,6 @@ class ProductViewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProductView
-        fields = ['id', 'product', 'product_name', 'viewer', 'viewer_username', 'viewed_at']
-        read_only_fields = ['viewed_at']
+        fields = ['id', 'product', 'product_name', 'viewer', 'viewer_username', 'viewed_at',
+                  'last_viewed_at', 'view_count']
+        read_only_fields = ['viewed_at', 'last_viewed_at', 'view_count']
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# ✅ Sent once per chunk by products.bulk, whose bulk_create/bulk_update
+# skip post_save, with instances (the created and updated products)
+products_bulk_saved = Signal()
@@ -1,3 +1,196 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products import bulk, hll, ingest
+from products.ingest import ViewBuffer
+from products.models import Product, ProductCategory, ProductViewRollup, ProductViewSketch
+
+
+class ViewBufferTests(TestCase):
+    def test_drain_never_loses_concurrent_events(self):
+        buffer = ViewBuffer(max_events=10 ** 6, flush_size=10 ** 9, flush_interval=3600)
+        buffer._thread = object()  # keep the flusher thread out of the test
+        writers, per_writer = 4, 20000
+        drained = []
+
+        def write(offset):
+            for i in range(per_writer):
+                buffer.record(1, offset + i, at=0)
+
+        threads = [threading.Thread(target=write, args=(n * per_writer,)) for n in range(writers)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            drained += buffer.drain()
+        for thread in threads:
+            thread.join()
+        drained += buffer.drain()
+
+        self.assertEqual(len(drained), writers * per_writer)
+        self.assertEqual(len({viewer for _, viewer, _ in drained}), writers * per_writer)
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', email='seller@example.com')
+        category = ProductCategory.objects.create(business=seller, name='Shoes')
+        cls.product = Product.objects.create(category=category, name='Runner', price=10)
+        cls.alice = User.objects.create_user(username='alice', email='alice@example.com')
+        cls.bob = User.objects.create_user(username='bob', email='bob@example.com')
+
+    def at(self, hour, minute=0):
+        return datetime(2026, 10, 18, hour, minute, tzinfo=dt_timezone.utc)
+
+    def counts(self, granularity):
+        return dict(
+            ProductViewRollup.objects.filter(product=self.product, granularity=granularity)
+            .values_list('bucket_start__hour', 'count')
+        )
+
+    def test_repeat_views_count_once_per_bucket(self):
+        pk = self.product.pk
+        events = [(pk, self.alice.pk, self.at(10, m)) for m in range(50)]
+        ingest.apply_events(events + [(pk, self.bob.pk, self.at(10, 5))])
+        # A later flush in the same hour adds nothing; the next hour counts again
+        ingest.apply_events([(pk, self.alice.pk, self.at(10, 55)), (pk, self.alice.pk, self.at(11, 5))])
+
+        self.assertEqual(self.counts('hour'), {10: 2, 11: 1})
+        self.assertEqual(self.counts('day'), {0: 2})
+        view = self.product.views.get(viewer=self.alice)
+        self.assertEqual(view.view_count, 52)
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_is_within_three_standard_errors(self):
+        # blake2b is deterministic, so these estimates never change between runs
+        for n in (10, 100, 1000, 10000, 100000):
+            sketch = hll.HyperLogLog()
+            sketch.update(range(n))
+            self.assertLessEqual(abs(sketch.count() - n), 0.1 * n, n)
+
+    def test_merge_blobs_is_registerwise_max(self):
+        rng = random.Random(0)
+        blobs = [bytes(rng.randrange(hll.VALUE_BITS + 2) for _ in range(hll.REGISTERS)) for _ in range(30)]
+        self.assertEqual(hll.merge_blobs(blobs[:1]), blobs[0])
+        for k in (2, 30):
+            self.assertEqual(hll.merge_blobs(blobs[:k]), bytes(map(max, *blobs[:k])))
+
+        rounds = 50
+        start = time.perf_counter()
+        for _ in range(rounds):
+            hll.merge_blobs(blobs)
+        elapsed = (time.perf_counter() - start) / rounds * 1e6
+        print(f"\nmerge_blobs: {elapsed:.0f} us/merge of {len(blobs)} sketches")
+        self.assertLess(elapsed, 20000)
+
+    def test_merged_sketches_count_the_union(self):
+        a, b = hll.HyperLogLog(), hll.HyperLogLog()
+        a.update(range(0, 6000))
+        b.update(range(4000, 10000))
+        union = hll.HyperLogLog.merged([a.to_bytes(), b.to_bytes(), b''])
+        self.assertLessEqual(abs(union.count() - 10000), 1000)
+
+
+class UniqueViewersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', email='seller@example.com')
+        category = ProductCategory.objects.create(business=seller, name='Shoes')
+        cls.product = Product.objects.create(category=category, name='Runner', price=10)
+
+    def test_sketches_merge_across_days(self):
+        pk = self.product.pk
+        day1 = datetime(2026, 10, 17, 12, tzinfo=dt_timezone.utc)
+        day2 = datetime(2026, 10, 18, 12, tzinfo=dt_timezone.utc)
+        hll.add_events([(pk, viewer, day1) for viewer in range(300)])
+        hll.add_events([(pk, viewer, day2) for viewer in range(200, 500)])
+
+        self.assertEqual(ProductViewSketch.objects.filter(product=self.product).count(), 2)
+        self.assertLessEqual(abs(hll.unique_viewers(pk, 7, now=day2) - 500), 50)
+        self.assertLessEqual(abs(hll.unique_viewers(pk, 1, now=day2) - 300), 30)
+
+
+class ProductBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', email='seller@example.com')
+        cls.shoes = ProductCategory.objects.create(business=cls.seller, name='Shoes')
+        cls.runner = Product.objects.create(category=cls.shoes, name='Runner', price=10, stock=3)
+        other = User.objects.create_user(username='other', email='other@example.com')
+        cls.foreign = Product.objects.create(
+            category=ProductCategory.objects.create(business=other, name='Hats'), name='Cap', price=5,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def post(self, body, content_type='text/csv', **extra):
+        return self.client.generic('POST', '/api/products/bulk/', body, content_type=content_type, **extra)
+
+    def test_readers(self):
+        csv_lines = [b'\xef\xbb\xbfname,price\n', b'"Two\n', b'lines",1\n', b'Boot,2\n']
+        self.assertEqual(
+            [(line, row['name']) for line, row in bulk.read_csv(csv_lines)],
+            [(3, 'Two\nlines'), (4, 'Boot')],
+        )
+        ndjson_lines = [b'{"name": "a"}\n', b'\n', b'[1]\n', b'{broken\n']
+        self.assertEqual(list(bulk.read_ndjson(ndjson_lines)), [(1, {'name': 'a'}), (3, None), (4, None)])
+
+    def test_csv_and_ndjson_round_trip(self):
+        for kind in ('csv', 'ndjson'):
+            exported = b''.join(self.client.get(f'/api/products/bulk/?type={kind}').streaming_content)
+            response = self.post(exported, 'application/x-ndjson' if kind == 'ndjson' else 'text/csv')
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (0, 1, 0))
+        self.assertEqual(Product.objects.filter(category__business=self.seller).count(), 1)
+
+    def test_reports_bad_rows_by_line(self):
+        body = (
+            'name,category_name,price,stock\n'
+            'Boot,shoes,20,1\n'
+            ',Shoes,20,1\n'
+            'Sandal,Hats,-1,x\n'
+        )
+        response = self.post(body.encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4])
+        self.assertEqual(set(response.data['errors'][1]['errors']), {'category', 'price', 'stock'})
+
+    def test_updates_only_own_products_once(self):
+        body = (
+            'id,category,name,price\n'
+            f'{self.foreign.pk},{self.shoes.pk},Stolen,1\n'
+            f'{self.runner.pk},{self.shoes.pk},Runner 2,11\n'
+            f'{self.runner.pk},{self.shoes.pk},Runner 3,12\n'
+        )
+        response = self.post(body.encode())
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+        self.runner.refresh_from_db()
+        self.foreign.refresh_from_db()
+        self.assertEqual((self.runner.name, self.runner.price), ('Runner 3', 12))
+        self.assertEqual(self.foreign.name, 'Cap')
+
+    def test_decode_error_keeps_rows_already_read(self):
+        body = b'name,category_name,price\nBoot,Shoes,20\nBad \xff,Shoes,1\nSandal,Shoes,3\n'
+        response = self.post(body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 3)
+        self.assertTrue(Product.objects.filter(name='Boot').exists())
 
-# Create your tests here.
+    def test_body_without_length_is_refused_not_imported_as_empty(self):
+        body = b'name,category_name,price\nBoot,Shoes,20\n'
+        response = self.post(body, CONTENT_LENGTH='', HTTP_TRANSFER_ENCODING='chunked')
+        self.assertEqual(response.status_code, 411)
+        self.assertEqual(self.post(b'', CONTENT_LENGTH='0').status_code, 400)
+        self.assertFalse(Product.objects.filter(name='Boot').exists())
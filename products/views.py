@@ -1,11 +1,17 @@
 # products/views.py
 
-from rest_framework import generics, permissions, filters
+
+from rest_framework import generics, permissions, filters, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from .models import ProductCategory, Product, ProductView
 from .serializers import ProductCategorySerializer, ProductSerializer, ProductViewSerializer
+from core.pagination import KeysetPagination
+from . import bulk, hll, ingest, rollups
+from django.utils import timezone
+from datetime import timedelta
 
 
 # ✅ CATEGORY LIST/CREATE VIEW
@@ -27,6 +33,8 @@ class ProductListCreateView(generics.ListCreateAPIView):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description', 'category__name']
     ordering_fields = ['created_at', 'price']
+    ordering = ['-created_at']
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         # Assign product to the selected category under the current user's business
@@ -56,12 +64,15 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ✅ PRODUCT VIEW TRACKING (records when a user views a product)
 class ProductViewRecordView(APIView):
+    """
+    Buffers the view in memory and answers 202 straight away; products.ingest
+    validates and writes it with the next batch.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        product = get_object_or_404(Product, pk=pk)
-        ProductView.objects.create(product=product, viewer=request.user)
-        return Response({'message': f'View recorded for {product.name}'})
+        ingest.record_view(pk, request.user.pk)
+        return Response({'message': 'View recorded'}, status=status.HTTP_202_ACCEPTED)
 
 
 # ✅ PRODUCT VIEW LIST (to see who viewed what)
@@ -72,3 +83,95 @@ class ProductViewListView(generics.ListAPIView):
     def get_queryset(self):
         product_id = self.kwargs.get('pk')
         return ProductView.objects.filter(product_id=product_id).select_related('viewer', 'product')
+
+
+# ✅ PRODUCT VIEW STATS (seller dashboard, read from the view rollups)
+class ProductViewStatsView(APIView):
+    """
+    Views of one of the seller's products over time.
+    params: days (default 30, max 365), granularity=(day|hour)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        product = get_object_or_404(Product.objects.select_related('category'), pk=pk)
+        if product.category.business_id != request.user.pk:
+            return Response({'error': 'You can only see stats for your own products.'}, status=403)
+
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            days = 30
+        granularity = request.query_params.get('granularity', rollups.DAY)
+        if granularity not in (rollups.DAY, rollups.HOUR):
+            granularity = rollups.DAY
+
+        since = timezone.now() - timedelta(days=days)
+        points = rollups.series(product.pk, since, granularity)
+        return Response({
+            'product': product.pk,
+            'granularity': granularity,
+            'total': sum(count for _, count in points),
+            'unique_viewers': hll.unique_viewers(product.pk, days),
+            'series': [{'bucket_start': start, 'views': count} for start, count in points],
+        })
+
+
+# ✅ PRODUCT BULK IMPORT/EXPORT (seller's own catalog)
+class ProductBulkView(APIView):
+    """
+    GET streams the catalog; POST imports rows, streamed from the body
+    (text/csv or application/x-ndjson) or from a multipart `file` upload.
+    params: type=(csv|ndjson), chunk_size (POST only)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_type(self, request, upload=None):
+        kind = request.query_params.get('type')
+        if not kind:
+            content_type = request.content_type or ''
+            name = getattr(upload, 'name', '') or ''
+            kind = 'ndjson' if 'ndjson' in content_type or name.endswith(('.ndjson', '.jsonl')) else 'csv'
+        return kind if kind in bulk.READERS else None
+
+    def get(self, request):
+        kind = request.query_params.get('type', 'csv')
+        if kind not in bulk.EXPORTERS:
+            return Response({'error': 'type must be csv or ndjson.'}, status=400)
+        export, content_type = bulk.EXPORTERS[kind]
+        chunk_size = bulk.get_bulk_settings()['EXPORT_CHUNK_SIZE']
+        response = StreamingHttpResponse(export(request.user, chunk_size), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="products.{kind}"'
+        return response
+
+    def post(self, request):
+        conf = bulk.get_bulk_settings()
+        try:
+            chunk_size = min(max(int(request.query_params.get('chunk_size', conf['CHUNK_SIZE'])), 1),
+                             conf['MAX_CHUNK_SIZE'])
+        except ValueError:
+            chunk_size = conf['CHUNK_SIZE']
+
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'Upload the rows as `file`.'}, status=400)
+            lines = upload
+        else:
+            upload = None
+            # DRF has no stream for an empty body, or one without Content-Length (chunked)
+            if request.stream is None:
+                if request.META.get('CONTENT_LENGTH'):
+                    return Response({'error': 'The request body is empty.'}, status=400)
+                return Response(
+                    {'error': 'Send a Content-Length header, or upload the rows as a multipart `file`.'},
+                    status=411,
+                )
+            lines = request.stream
+        kind = self.get_type(request, upload)
+        if kind is None:
+            return Response({'error': 'type must be csv or ndjson.'}, status=400)
+
+        report = bulk.import_rows(request.user, bulk.READERS[kind](lines), chunk_size)
+        result = report.as_dict()
+        return Response(result, status=200 if report.created or report.updated or not report.failed else 400)
@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import Rating
+from .models import Rating, RatingAggregate
 
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
     list_display = ('rater', 'rated_user', 'stars', 'created_at')
     list_filter = ('stars', 'created_at')
     search_fields = ('rater__username', 'rated_user__username', 'comment')
+
+
+@admin.register(RatingAggregate)
+class RatingAggregateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'count', 'average', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    search_fields = ('user__username',)
+    readonly_fields = ('count', 'total', 'average', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_aggregates(apps, schema_editor):
+    Rating = apps.get_model('ratings', 'Rating')
+    RatingAggregate = apps.get_model('ratings', 'RatingAggregate')
+
+    totals = {}
+    for user_id, stars in Rating.objects.values_list('rated_user_id', 'stars').iterator(chunk_size=5000):
+        agg = totals.setdefault(user_id, {'count': 0, 'total': 0})
+        agg['count'] += 1
+        agg['total'] += stars
+        if 1 <= stars <= 5:
+            agg[f'stars_{stars}'] = agg.get(f'stars_{stars}', 0) + 1
+
+    RatingAggregate.objects.bulk_create(
+        [
+            RatingAggregate(user_id=user_id, average=agg['total'] / agg['count'], **agg)
+            for user_id, agg in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_caution_message_user_suspended_until_and_more'),
+        ('ratings', '0002_rating_rating_recent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingAggregate',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_aggregate', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('average', models.FloatField(db_index=True, default=0.0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models import Avg
+from django.db.models import F, Case, When, Value, FloatField
+from django.db.models.functions import Cast
 
 User = settings.AUTH_USER_MODEL
 
@@ -14,16 +15,107 @@ class Rating(models.Model):
     class Meta:
         unique_together = ('rater', 'rated_user')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='rating_recent_idx'),
+            models.Index(fields=['rated_user', '-created_at', '-id'], name='rating_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.rater} rated {self.rated_user} ({self.stars}⭐)"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_state()
+        return instance
+
+    def _remember_stored_state(self):
+        # What the aggregate currently counts for this row
+        self._stored = (self.rated_user_id, self.stars)
+
+    @property
+    def stored_state(self):
+        return getattr(self, '_stored', None)
+
+    def lock_stored_state(self):
+        """
+        Re-read (and lock) what the aggregate counts for this row, so two
+        edits of one rating never both take back the same old value. Call
+        inside a transaction; the state is None once the row is gone.
+        """
+        self._stored = (
+            Rating.objects.select_for_update().filter(pk=self.pk)
+            .values_list('rated_user_id', 'stars').first()
+        )
+        return self._stored
+
     def save(self, *args, **kwargs):
-        """Save rating and auto-update rated user's average rating"""
-        super().save(*args, **kwargs)
-        self.update_user_average()
-
-    def update_user_average(self):
-        avg = Rating.objects.filter(rated_user=self.rated_user).aggregate(avg_stars=Avg('stars'))['avg_stars']
-        self.rated_user.average_rating = avg or 0
-        self.rated_user.save(update_fields=['average_rating'])
+        """Save rating and apply the change to the rated user's RatingAggregate"""
+        with transaction.atomic():
+            # The aggregate is updated first so post_save receivers see it
+            previous = None if self._state.adding else self.lock_stored_state()
+            current = (self.rated_user_id, self.stars)
+            if previous is None:
+                RatingAggregate.apply(self.rated_user_id, added=self.stars)
+            elif previous != current:
+                old_user_id, old_stars = previous
+                if old_user_id == self.rated_user_id:
+                    RatingAggregate.apply(self.rated_user_id, added=self.stars, removed=old_stars)
+                else:
+                    RatingAggregate.apply(old_user_id, removed=old_stars)
+                    RatingAggregate.apply(self.rated_user_id, added=self.stars)
+            super().save(*args, **kwargs)
+        self._remember_stored_state()
+
+
+class RatingAggregate(models.Model):
+    """
+    Running totals of the ratings a user has received: count, sum, average
+    and a 1–5 star histogram. Kept current by Rating.save and the post_delete
+    handler in ratings.signals, each change being a single UPDATE.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rating_aggregate')
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    average = models.FloatField(default=0.0, db_index=True)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    STAR_VALUES = range(1, 6)
+
+    def __str__(self):
+        return f"{self.user} ({self.average:.2f} from {self.count} ratings)"
+
+    @property
+    def histogram(self):
+        return {stars: getattr(self, f'stars_{stars}') for stars in self.STAR_VALUES}
+
+    @classmethod
+    def apply(cls, user_id, added=None, removed=None):
+        """Add and/or remove one rating's stars with an atomic F() update."""
+        count_delta = (added is not None) - (removed is not None)
+        total_delta = (added or 0) - (removed or 0)
+        changes = {
+            'count': F('count') + count_delta,
+            'total': F('total') + total_delta,
+            'average': Case(
+                When(count__lte=-count_delta, then=Value(0.0)),
+                default=Cast(F('total') + total_delta, FloatField()) / (F('count') + count_delta),
+                output_field=FloatField(),
+            ),
+        }
+        if added in cls.STAR_VALUES:
+            changes[f'stars_{added}'] = F(f'stars_{added}') + 1
+        if removed in cls.STAR_VALUES:
+            key = f'stars_{removed}'
+            changes[key] = (changes[key] if key in changes else F(key)) - 1
+
+        with transaction.atomic():
+            updated = cls.objects.filter(user_id=user_id).update(**changes)
+            if not updated and added is not None:
+                # First rating this user receives
+                cls.objects.get_or_create(user_id=user_id)
+                cls.objects.filter(user_id=user_id).update(**changes)
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Rating, RatingAggregate
+
+
+# ✅ Lock the row before it goes; the collector sends this inside its transaction
+@receiver(pre_delete, sender=Rating)
+def lock_deleted_rating(sender, instance, **kwargs):
+    instance.lock_stored_state()
+
+
+# ✅ Take a deleted rating out of the rated user's aggregate
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_aggregate(sender, instance, **kwargs):
+    stored = instance.stored_state
+    if stored is None:
+        return
+    rated_user_id, stars = stored
+    RatingAggregate.apply(rated_user_id, removed=stars)
@@ -1,3 +1,70 @@
+from django.db.models import Avg, Count
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from ratings.models import Rating, RatingAggregate
+
+
+class RatingAggregateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller, cls.other = [
+            User.objects.create_user(username=name, email=f'{name}@example.com') for name in ('seller', 'other')
+        ]
+        cls.raters = [
+            User.objects.create_user(username=f'rater{i}', email=f'rater{i}@example.com') for i in range(4)
+        ]
+
+    def assertMatchesRatings(self, user):
+        expected = Rating.objects.filter(rated_user=user).aggregate(count=Count('pk'), average=Avg('stars'))
+        aggregate = RatingAggregate.objects.filter(user=user).first()
+        if aggregate is None:
+            self.assertEqual(expected['count'], 0)
+            return
+        self.assertEqual(aggregate.count, expected['count'])
+        self.assertAlmostEqual(aggregate.average, expected['average'] or 0.0)
+        histogram = dict(
+            Rating.objects.filter(rated_user=user).values_list('stars').annotate(n=Count('pk'))
+        )
+        self.assertEqual(aggregate.histogram, {stars: histogram.get(stars, 0) for stars in range(1, 6)})
+
+    def rate(self, rater, stars, user=None):
+        return Rating.objects.create(rater=rater, rated_user=user or self.seller, stars=stars)
+
+    def test_create_update_and_delete(self):
+        ratings = [self.rate(rater, stars) for rater, stars in zip(self.raters, (5, 4, 2, 2))]
+        self.assertMatchesRatings(self.seller)
+
+        ratings[2].stars = 5
+        ratings[2].save()
+        self.assertMatchesRatings(self.seller)
+
+        ratings[0].delete()
+        self.assertMatchesRatings(self.seller)
+
+        Rating.objects.filter(rated_user=self.seller, stars=2).delete()
+        self.assertMatchesRatings(self.seller)
+
+    def test_moving_a_rating_to_another_user(self):
+        rating = self.rate(self.raters[0], 4)
+        self.rate(self.raters[1], 2)
+        rating.rated_user = self.other
+        rating.stars = 3
+        rating.save()
+        self.assertMatchesRatings(self.seller)
+        self.assertMatchesRatings(self.other)
+
+    def test_stale_copies_do_not_drift(self):
+        self.rate(self.raters[0], 3)
+        first, second = Rating.objects.get(), Rating.objects.get()
+        first.stars = 5
+        first.save()
+        # Loaded before the first edit, so its own idea of the old value is stale
+        second.stars = 1
+        second.save()
+        self.assertMatchesRatings(self.seller)
+
+        first.delete()
+        second.delete()
+        self.assertMatchesRatings(self.seller)
+        self.assertEqual(RatingAggregate.objects.get(user=self.seller).count, 0)
@@ -1,12 +1,14 @@
 from rest_framework import generics, permissions
 from .models import Rating
 from .serializers import RatingSerializer
+from core.pagination import KeysetPagination
 
 # ✅ Create and List Ratings
 class RatingListCreateView(generics.ListCreateAPIView):
     queryset = Rating.objects.all().select_related('rater', 'rated_user')
     serializer_class = RatingSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(rater=self.request.user)